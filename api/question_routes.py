@@ -1,7 +1,8 @@
 """
 API routes for question management
 """
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, request, jsonify, session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,9 @@ except ImportError:
 # Create blueprint for question API routes
 question_api = Blueprint('question_api', __name__, url_prefix='/api')
 
+# Most flashcard progress events accepted in one batch POST
+MAX_FLASHCARD_PROGRESS_EVENTS = 200
+
 @question_api.route('/questions')
 def get_questions():
     """API endpoint to get questions with optional filtering"""
@@ -405,7 +409,12 @@ def get_quiz_question_api(quiz_id, question_number):
     try:
         question = quiz_service.get_quiz_question(quiz_id, question_number)
         
-        if question:
+        if question and 'error' in question:
+            return jsonify({
+                'success': False,
+                'error': question['error']
+            }), 409
+        elif question:
             return jsonify({
                 'success': True,
                 'question': question
@@ -734,3 +743,135 @@ def set_flashcard(session_id):
             'success': False,
             'error': str(e)
         }), 500
+
+@question_api.route('/flashcards/<session_id>/progress', methods=['POST'])
+def save_flashcard_progress(session_id):
+    """API endpoint to save a batch of flashcard progress events in one insert"""
+    if not flashcard_service:
+        return jsonify({
+            'success': False,
+            'error': 'Flashcard service not configured. Please implement database connection.'
+        }), 503
+    
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'error': 'Login required to track flashcard progress'
+        }), 401
+    
+    try:
+        flashcard_session = flashcard_service.get_session(session_id)
+        if not flashcard_session:
+            return jsonify({
+                'success': False,
+                'error': 'Flashcard session not found'
+            }), 404
+        
+        # silent=True so malformed JSON is a 400 here rather than a BadRequest caught below as a 500
+        data = request.get_json(silent=True)
+        events = data.get('events') if isinstance(data, dict) else None
+        if not isinstance(events, list):
+            return jsonify({
+                'success': False,
+                'error': 'events must be a list'
+            }), 400
+        if len(events) > MAX_FLASHCARD_PROGRESS_EVENTS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_FLASHCARD_PROGRESS_EVENTS} events can be saved per request'
+            }), 400
+        
+        # Rows default to this session's section; clients only report card views
+        rows = []
+        for event in events:
+            cards_viewed = event.get('cards_viewed', 1) if isinstance(event, dict) else None
+            if type(cards_viewed) is not int or cards_viewed < 1:
+                return jsonify({
+                    'success': False,
+                    'error': 'Each event must have an integer cards_viewed of at least 1'
+                }), 400
+            rows.append({
+                'section': flashcard_session.section,
+                'cards_viewed': cards_viewed,
+                'session_id': session_id
+            })
+        
+        from services.progress_service import progress_service
+        result = progress_service.save_flashcard_progress_batch(
+            user_id,
+            rows,
+            access_token=session.get('access_token'),
+            refresh_token=session.get('refresh_token')
+        )
+        
+        if result.get('success'):
+            return jsonify({
+                'success': True,
+                'saved': result.get('saved', len(rows))
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': result.get('error', 'Failed to save flashcard progress')
+            }), 500
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@question_api.route('/progress/quiz-history')
+def get_quiz_history_api():
+    """API endpoint to page through the user's quiz history (newest first)"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'error': 'Login required to view quiz history'
+        }), 401
+    
+    # The cursor is "<completed_at>,<id>" of the last row on the previous page
+    before = None
+    cursor = request.args.get('before')
+    if cursor:
+        completed_at, _, row_id = cursor.rpartition(',')
+        try:
+            # Re-serialize the timestamp so only a well-formed value reaches the PostgREST filter
+            completed_at = datetime.fromisoformat(completed_at).isoformat()
+        except ValueError:
+            completed_at = None
+        if not completed_at or not row_id.isdigit():
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor'
+            }), 400
+        before = (completed_at, int(row_id))
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+        
+        from services.progress_service import progress_service
+        results = progress_service.get_user_quiz_history(
+            user_id,
+            limit=limit,
+            access_token=session.get('access_token'),
+            refresh_token=session.get('refresh_token'),
+            before=before
+        )
+        
+        # The oldest row's (completed_at, id) is the cursor for the next page
+        next_cursor = None
+        if len(results) == limit:
+            next_cursor = f"{results[-1].get('completed_at')},{results[-1].get('id')}"
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -2,20 +2,126 @@
 Question manager for Supabase database operations
 """
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import logging
 import json
+import random
+import time
+from functools import lru_cache
+
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so handlers work with either
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Question columns stored as JSON-encoded lists
+_JSON_FIELDS = ('options', 'tags', 'correct_answers')
+
+# PostgREST / Postgres error codes meaning an RPC's SQL function has not been created
+_MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+
+def parse_question_json_fields(question: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Decode the JSON-encoded list columns of a question row in place
+    
+    Rows are parsed once when loaded from the database so quiz builders
+    can use options, tags and correct_answers as Python lists directly.
+    
+    Args:
+        question: Question row as returned by Supabase
+        
+    Returns:
+        The same dictionary with its JSON fields decoded
+    """
+    for field in _JSON_FIELDS:
+        value = question.get(field)
+        if value and isinstance(value, str):
+            try:
+                question[field] = json_loads(value)
+            except json.JSONDecodeError:
+                # A bare correct_answers string is a single accepted answer
+                question[field] = [value] if field == 'correct_answers' else []
+    
+    return question
+
+def encode_question_json_fields(question: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encode list columns as JSON text in place before a write
+    
+    correct_answers is always stored as a JSON array; a bare (non-JSON)
+    string is wrapped as a single accepted answer so stored rows never
+    need the plain-string fallback when read back.
+    
+    Args:
+        question: Question data about to be inserted or updated
+        
+    Returns:
+        The same dictionary with its list fields encoded
+    """
+    answers = question.get('correct_answers')
+    if answers and isinstance(answers, str) and not answers.lstrip().startswith('['):
+        question['correct_answers'] = [answers]
+    for field in _JSON_FIELDS:
+        if isinstance(question.get(field), list):
+            question[field] = json.dumps(question[field])
+    return question
+
 class QuestionManager:
     """Manager for question-related Supabase database operations"""
     
+    # How long per-category counts are reused before being re-queried
+    COUNTS_CACHE_TTL_SECONDS = 300
+    
+    # How long a parsed get_question row is reused before being re-queried
+    QUESTION_CACHE_TTL_SECONDS = 300
+    
+    # How long to skip an RPC whose SQL function is missing before trying it again
+    MISSING_RPC_RETRY_SECONDS = 300
+    
     def __init__(self, db_manager):
         self.db_manager = db_manager
         self.questions_table = db_manager.get_table('questions')
+        # Bumped on every write so cached aggregates from older versions are ignored
+        self._version = 0
+        self._counts_cache: Dict[Optional[str], Tuple[int, float, Dict[str, int]]] = {}
+        # RPC name -> monotonic time until which its client-side fallback is used directly
+        self._missing_rpcs: Dict[str, float] = {}
+        # Parsed rows for get_question, keyed by (id, version, TTL window)
+        self._get_question_parsed = lru_cache(maxsize=4096)(self._fetch_question_parsed)
         logger.info("QuestionManager initialized with Supabase")
     
+    @property
+    def version(self) -> int:
+        """Write version of the questions table; caches keyed on it miss after any edit"""
+        return self._version
+    
+    def _bump_version(self):
+        """Record a write to the questions table"""
+        self._version += 1
+        self._get_question_parsed.cache_clear()
+        # A write may come with a schema migration, so try missing RPCs again
+        self._missing_rpcs.clear()
+    
+    def _rpc_available(self, name: str) -> bool:
+        """False while an RPC is remembered as missing from the database"""
+        return self._missing_rpcs.get(name, 0) <= time.monotonic()
+    
+    def _rpc_failed(self, name: str, error: Exception):
+        """Log an RPC failure, remembering it if the SQL function does not exist"""
+        if getattr(error, 'code', None) in _MISSING_FUNCTION_CODES:
+            self._missing_rpcs[name] = time.monotonic() + self.MISSING_RPC_RETRY_SECONDS
+            logger.warning(f"{name} SQL function not found, using the client-side fallback for "
+                           f"{self.MISSING_RPC_RETRY_SECONDS}s: {error}")
+        else:
+            logger.warning(f"{name} RPC failed, using the client-side fallback: {error}")
+    
+    def invalidate_counts_cache(self):
+        """Drop cached per-category counts"""
+        self._counts_cache.clear()
+    
     def add_question(self, question_data: Dict[str, Any]) -> str:
         """
         Add a new question to the database
@@ -32,17 +138,13 @@ class QuestionManager:
             question_data['updated_at'] = datetime.utcnow().isoformat()
             
             # Convert lists to JSON strings for storage
-            if 'options' in question_data and isinstance(question_data['options'], list):
-                question_data['options'] = json.dumps(question_data['options'])
-            if 'tags' in question_data and isinstance(question_data['tags'], list):
-                question_data['tags'] = json.dumps(question_data['tags'])
-            if 'correct_answers' in question_data and isinstance(question_data['correct_answers'], list):
-                question_data['correct_answers'] = json.dumps(question_data['correct_answers'])
+            encode_question_json_fields(question_data)
             
             result = self.questions_table.insert(question_data).execute()
             
             if result.data and len(result.data) > 0:
                 question_id = str(result.data[0]['id'])
+                self._bump_version()
                 logger.info(f"Question added with ID: {question_id}")
                 return question_id
             else:
@@ -63,30 +165,39 @@ class QuestionManager:
             Dict containing question data or None if not found
         """
         try:
-            result = self.questions_table.select('*').eq('id', question_id).execute()
-            
-            if result.data and len(result.data) > 0:
-                question = result.data[0]
-                # Parse JSON fields back to Python objects
-                if question.get('options'):
-                    question['options'] = json.loads(question['options'])
-                if question.get('tags'):
-                    question['tags'] = json.loads(question['tags'])
-                if question.get('correct_answers'):
-                    question['correct_answers'] = json.loads(question['correct_answers'])
-                return question
+            # Keyed on the write version so edits made through this manager are seen at once,
+            # and on a TTL window so edits made elsewhere (other workers, the dashboard) are seen eventually
+            ttl_window = int(time.monotonic() // self.QUESTION_CACHE_TTL_SECONDS)
+            question = self._get_question_parsed(str(question_id), self._version, ttl_window)
+        except LookupError:
             return None
-            
         except Exception as e:
             logger.error(f"Error getting question {question_id}: {e}")
             return None
+        # Copy so callers cannot mutate the cached row
+        return dict(question)
+    
+    def _fetch_question_parsed(self, question_id: str, version: int, ttl_window: int) -> Dict[str, Any]:
+        """
+        Load and decode one question row (memoized via self._get_question_parsed)
+        
+        version and ttl_window are only part of the cache key.
+        """
+        result = self.questions_table.select('*').eq('id', question_id).execute()
+        
+        if not result.data:
+            # Raise instead of returning so missing ids are not cached
+            raise LookupError(question_id)
+        # Parse JSON fields back to Python objects
+        return parse_question_json_fields(result.data[0])
     
     def get_questions(self, 
                      category: str = None, 
                      difficulty: str = None, 
                      tags: List[str] = None,
                      limit: int = 50,
-                     skip: int = 0) -> List[Dict[str, Any]]:
+                     skip: int = 0,
+                     categories: List[str] = None) -> List[Dict[str, Any]]:
         """
         Get questions with optional filtering
         
@@ -96,6 +207,7 @@ class QuestionManager:
             tags: Filter by tags (any match)
             limit: Maximum number of questions to return
             skip: Number of questions to skip (for pagination)
+            categories: Filter by any of several categories in one query (category IN (...))
             
         Returns:
             List of question dictionaries
@@ -106,6 +218,8 @@ class QuestionManager:
             # Apply filters
             if category:
                 query = query.eq('category', category)
+            if categories:
+                query = query.in_('category', categories)
             if difficulty:
                 query = query.eq('difficulty', difficulty)
             
@@ -119,15 +233,8 @@ class QuestionManager:
             
             questions = []
             if result.data:
-                for question in result.data:
-                    # Parse JSON fields back to Python objects
-                    if question.get('options'):
-                        question['options'] = json.loads(question['options'])
-                    if question.get('tags'):
-                        question['tags'] = json.loads(question['tags'])
-                    if question.get('correct_answers'):
-                        question['correct_answers'] = json.loads(question['correct_answers'])
-                    questions.append(question)
+                # Parse JSON fields back to Python objects
+                questions = [parse_question_json_fields(question) for question in result.data]
             
             # Filter by tags if specified (PostgreSQL JSON operations)
             if tags and questions:
@@ -144,6 +251,41 @@ class QuestionManager:
             logger.error(f"Error getting questions: {e}")
             return []
     
+    def get_random_questions(self,
+                             limit: int,
+                             difficulty: str = None,
+                             categories: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get up to limit questions in random order, selected by the database
+        
+        Uses the get_random_questions SQL function (ORDER BY RANDOM() LIMIT k)
+        so only the chosen rows cross the wire. If the function has not been
+        created yet, falls back to sampling a 3x over-fetch client-side, and
+        skips the RPC for MISSING_RPC_RETRY_SECONDS or until the next write.
+        
+        Args:
+            limit: Number of questions to return
+            difficulty: Filter by difficulty level
+            categories: Filter by any of these categories
+            
+        Returns:
+            List of question dictionaries
+        """
+        if self._rpc_available('get_random_questions'):
+            try:
+                result = self.db_manager.get_client().rpc('get_random_questions', {
+                    'p_limit': limit,
+                    'p_difficulty': difficulty,
+                    'p_categories': categories
+                }).execute()
+                return [parse_question_json_fields(question) for question in (result.data or [])]
+                
+            except Exception as e:
+                self._rpc_failed('get_random_questions', e)
+        
+        questions = self.get_questions(difficulty=difficulty, categories=categories, limit=limit * 3)
+        return random.sample(questions, min(limit, len(questions)))
+    
     def update_question(self, question_id: str, update_data: Dict[str, Any]) -> bool:
         """
         Update a question
@@ -159,14 +301,10 @@ class QuestionManager:
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
             # Convert lists to JSON strings for storage
-            if 'options' in update_data and isinstance(update_data['options'], list):
-                update_data['options'] = json.dumps(update_data['options'])
-            if 'tags' in update_data and isinstance(update_data['tags'], list):
-                update_data['tags'] = json.dumps(update_data['tags'])
-            if 'correct_answers' in update_data and isinstance(update_data['correct_answers'], list):
-                update_data['correct_answers'] = json.dumps(update_data['correct_answers'])
+            encode_question_json_fields(update_data)
             
             result = self.questions_table.update(update_data).eq('id', question_id).execute()
+            self._bump_version()
             
             return result.data is not None and len(result.data) > 0
             
@@ -186,6 +324,7 @@ class QuestionManager:
         """
         try:
             result = self.questions_table.delete().eq('id', question_id).execute()
+            self._bump_version()
             return result.data is not None and len(result.data) > 0
             
         except Exception as e:
@@ -216,7 +355,7 @@ class QuestionManager:
                 for question in result.data:
                     if question.get('tags'):
                         try:
-                            tags = json.loads(question['tags'])
+                            tags = json_loads(question['tags'])
                             if isinstance(tags, list):
                                 all_tags.update(tags)
                         except json.JSONDecodeError:
@@ -244,6 +383,81 @@ class QuestionManager:
         except Exception as e:
             logger.error(f"Error getting question count: {e}")
             return 0
+    
+    def get_counts_by_category(self, difficulty: str = None) -> Dict[str, int]:
+        """
+        Get per-category question counts, served from a TTL cache
+        
+        Cached entries are keyed by difficulty and dropped after
+        COUNTS_CACHE_TTL_SECONDS or as soon as a question is added,
+        updated or deleted through this manager.
+        
+        Args:
+            difficulty: Optional difficulty filter
+            
+        Returns:
+            Dictionary mapping category name to question count
+        """
+        cached = self._counts_cache.get(difficulty)
+        if cached and cached[0] == self._version and cached[1] > time.monotonic():
+            return dict(cached[2])
+        
+        version = self._version
+        counts = self._query_counts_by_category(difficulty)
+        if counts:
+            self._counts_cache[difficulty] = (version, time.monotonic() + self.COUNTS_CACHE_TTL_SECONDS, counts)
+        return dict(counts)
+    
+    def _query_counts_by_category(self, difficulty: str = None) -> Dict[str, int]:
+        """
+        Count questions per category with the question_counts_by_category SQL function
+        
+        The database groups and counts, so one row per category crosses the
+        wire. If the function has not been created yet, falls back to paging
+        through the category column, and skips the RPC for
+        MISSING_RPC_RETRY_SECONDS or until the next write.
+        """
+        if self._rpc_available('question_counts_by_category'):
+            try:
+                result = self.db_manager.get_client().rpc('question_counts_by_category', {
+                    'p_difficulty': difficulty
+                }).execute()
+                return {row['category']: row['question_count'] for row in (result.data or []) if row.get('category')}
+                
+            except Exception as e:
+                self._rpc_failed('question_counts_by_category', e)
+        
+        return self._page_counts_by_category(difficulty)
+    
+    def _page_counts_by_category(self, difficulty: str = None, page_size: int = 1000) -> Dict[str, int]:
+        """
+        Count questions per category by paging over the category column (RPC fallback)
+        
+        Only the category column is fetched, in pages of page_size rows (the
+        PostgREST max-rows default), and counted here.
+        """
+        try:
+            counts: Dict[str, int] = {}
+            offset = 0
+            while True:
+                query = self.questions_table.select('category')
+                if difficulty:
+                    query = query.eq('difficulty', difficulty)
+                result = query.order('id').range(offset, offset + page_size - 1).execute()
+                
+                rows = result.data or []
+                for row in rows:
+                    category = row.get('category')
+                    if category:
+                        counts[category] = counts.get(category, 0) + 1
+                
+                if len(rows) < page_size:
+                    return counts
+                offset += page_size
+            
+        except Exception as e:
+            logger.error(f"Error getting question counts by category: {e}")
+            return {}
 
 # Global question manager instance
 try:
@@ -83,7 +83,7 @@ def flashcard_section(section):
             total_cards = flashcard.get('total_cards', 1)
             # Save progress (we'll track views per card, but for now track session)
             try:
-                save_result = progress_service.save_flashcard_progress(
+                save_result = progress_service.save_flashcard_progress_async(
                     user_id=user_id,
                     section=section,
                     cards_viewed=1,  # Track initial view, could be enhanced to track per card
@@ -139,7 +139,7 @@ def quiz_section(section):
     # Get the first question
     current_question = quiz_service.get_quiz_question(quiz_id, 1)
     
-    if not current_question:
+    if not current_question or 'error' in current_question:
         flash('Error loading quiz questions.', 'error')
         return redirect(url_for('quizzes'))
     
@@ -178,7 +178,7 @@ def quiz_random():
     # Get the first question
     current_question = quiz_service.get_quiz_question(quiz_id, 1)
     
-    if not current_question:
+    if not current_question or 'error' in current_question:
         flash('Error loading quiz questions.', 'error')
         return redirect(url_for('quizzes'))
     
@@ -207,7 +207,7 @@ def quiz_practice_test():
     # Get the first question
     current_question = quiz_service.get_quiz_question(quiz_id, 1)
     
-    if not current_question:
+    if not current_question or 'error' in current_question:
         flash('Error loading practice test questions.', 'error')
         return redirect(url_for('quizzes'))
     
@@ -228,7 +228,7 @@ def quiz_question(quiz_id, question_number):
     
     current_question = quiz_service.get_quiz_question(quiz_id, question_number)
     
-    if not current_question:
+    if not current_question or 'error' in current_question:
         flash('Question not found.', 'error')
         return redirect(url_for('quizzes'))
     
@@ -293,7 +293,7 @@ def submit_quiz_answer(quiz_id):
     
     # Get the question that was just answered (before it advanced)
     # We need to get it from the session's questions list using the index
-    from utils.quiz_logic import quiz_manager
+    from utils.quiz_logic import quiz_manager, MULTIPLE_CHOICE_TYPES
     session = quiz_manager.get_session(quiz_id)
     if not session:
         flash('Error loading question.', 'error')
@@ -340,7 +340,7 @@ def submit_quiz_answer(quiz_id):
     
     # Get correct answer index for multiple choice questions
     correct_answer_index = None
-    if current_question.get('question_type') in ['multiple_choice', 'concept_multiple_choice', 'scenario_multiple_choice']:
+    if current_question.get('question_type') in MULTIPLE_CHOICE_TYPES:
         correct_answer = current_question.get('correct_answer', '')
         if isinstance(correct_answer, (int, str)) and str(correct_answer).isdigit():
             correct_answer_index = int(correct_answer)
@@ -395,6 +395,9 @@ def quiz_results(quiz_id):
                     section = int(parts[2])
             except (ValueError, IndexError):
                 pass
+        elif quiz_id.startswith('category_quiz_'):
+            # Category quizzes store the category as the session's chapter
+            section = quiz_service.CATEGORY_TO_SECTION.get(results.get('chapter'))
         
         # Prepare quiz result data
         quiz_result_data = {
@@ -409,18 +412,18 @@ def quiz_results(quiz_id):
         
         # Save to database
         try:
-            save_result = progress_service.save_quiz_result(user_id, quiz_result_data, access_token=access_token, refresh_token=refresh_token)
+            save_result = progress_service.save_quiz_result_async(user_id, quiz_result_data, access_token=access_token, refresh_token=refresh_token)
             if not save_result.get('success'):
                 logger.warning(f"Failed to save quiz result: {save_result.get('error')}")
             else:
-                logger.info(f"Successfully saved quiz result for user {user_id[:8]}...")
+                logger.info(f"Queued quiz result save for user {user_id[:8]}...")
         except Exception as e:
             logger.error(f"Error saving quiz result: {e}", exc_info=True)
         
         # Save study session
         if results.get('duration_seconds'):
             try:
-                progress_service.save_study_session(
+                progress_service.save_study_session_async(
                     user_id=user_id,
                     session_type=results.get('quiz_type', 'quiz'),
                     duration_seconds=int(results.get('duration_seconds', 0)),
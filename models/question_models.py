@@ -2,7 +2,7 @@
 Question models for Security Plus Training Tool
 """
 from typing import List, Dict, Any, Optional, Union
-from datetime import datetime
+from datetime import datetime, timezone
 from .enums import QuestionType, DifficultyLevel, QuestionCategory
 
 class QuestionModel:
@@ -37,8 +37,8 @@ class QuestionModel:
         self.explanation = explanation
         self.tags = tags or []
         self.reference = reference
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self.created_at = datetime.now(timezone.utc)
+        self.updated_at = self.created_at
         
         # Store additional fields
         for key, value in kwargs.items():
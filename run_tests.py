@@ -22,6 +22,13 @@ def run_tests():
         '--color=yes'
     ]
     
+    # Spread test modules across CPU cores if pytest-xdist is available
+    try:
+        import xdist
+        cmd.extend(['-n', 'auto', '--dist', 'loadgroup'])
+    except ImportError:
+        print("pytest-xdist not available, running serially. Install with: pip install pytest-xdist")
+    
     # Add coverage if available
     try:
         import coverage
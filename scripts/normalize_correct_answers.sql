@@ -0,0 +1,11 @@
+-- Normalize questions.correct_answers to JSON arrays for Security+ Training Tool
+-- Run this SQL once in your Supabase SQL Editor on databases created before
+-- QuestionManager started encoding correct_answers as a JSON array on write.
+
+-- Wrap bare answer strings (anything that is not already a JSON array) as a
+-- one-element array, e.g. 'encryption' -> '["encryption"]'
+UPDATE questions
+SET correct_answers = json_build_array(correct_answers)::text
+WHERE correct_answers IS NOT NULL
+  AND correct_answers <> ''
+  AND left(ltrim(correct_answers), 1) <> '[';
@@ -51,6 +51,37 @@ CREATE TRIGGER update_questions_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Pick random questions server-side so only the rows used are sent to the app.
+-- Shuffles ids (not full rows) and joins back for the selected ones.
+CREATE OR REPLACE FUNCTION get_random_questions(
+    p_limit INTEGER,
+    p_difficulty TEXT DEFAULT NULL,
+    p_categories TEXT[] DEFAULT NULL
+)
+RETURNS SETOF questions AS $$
+    SELECT q.*
+    FROM questions q
+    WHERE q.id IN (
+        SELECT id FROM questions
+        WHERE (p_difficulty IS NULL OR difficulty = p_difficulty)
+          AND (p_categories IS NULL OR category = ANY(p_categories))
+        ORDER BY RANDOM()
+        LIMIT p_limit
+    )
+    ORDER BY RANDOM();
+$$ LANGUAGE sql VOLATILE;
+
+-- Count questions per category server-side so statistics pages receive one row per category.
+CREATE OR REPLACE FUNCTION question_counts_by_category(
+    p_difficulty TEXT DEFAULT NULL
+)
+RETURNS TABLE (category TEXT, question_count BIGINT) AS $$
+    SELECT q.category::TEXT, COUNT(*)
+    FROM questions q
+    WHERE p_difficulty IS NULL OR q.difficulty = p_difficulty
+    GROUP BY q.category;
+$$ LANGUAGE sql STABLE;
+
 -- Enable Row Level Security (RLS) for better security
 ALTER TABLE questions ENABLE ROW LEVEL SECURITY;
 
@@ -44,6 +44,9 @@ CREATE INDEX IF NOT EXISTS idx_user_quiz_results_user_id ON user_quiz_results(us
 CREATE INDEX IF NOT EXISTS idx_user_quiz_results_completed_at ON user_quiz_results(completed_at DESC);
 CREATE INDEX IF NOT EXISTS idx_user_quiz_results_quiz_type ON user_quiz_results(quiz_type);
 CREATE INDEX IF NOT EXISTS idx_user_quiz_results_section ON user_quiz_results(section);
+-- One row per quiz session: save_quiz_result upserts on (user_id, quiz_id) so retries stay idempotent.
+-- Existing databases must remove duplicate (user_id, quiz_id) rows before this index can be built.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_quiz_results_user_quiz ON user_quiz_results(user_id, quiz_id);
 
 CREATE INDEX IF NOT EXISTS idx_user_flashcard_progress_user_id ON user_flashcard_progress(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_flashcard_progress_section ON user_flashcard_progress(section);
@@ -53,6 +56,31 @@ CREATE INDEX IF NOT EXISTS idx_user_study_sessions_user_id ON user_study_session
 CREATE INDEX IF NOT EXISTS idx_user_study_sessions_started_at ON user_study_sessions(started_at DESC);
 CREATE INDEX IF NOT EXISTS idx_user_study_sessions_session_type ON user_study_sessions(session_type);
 
+-- Composite indexes matching the per-user dashboard queries:
+-- quiz history (ORDER BY completed_at DESC LIMIT n), performance trends
+-- (completed_at >= cutoff), study time (started_at >= cutoff) and flashcard
+-- totals. INCLUDE columns let these be answered from the index alone.
+CREATE INDEX IF NOT EXISTS idx_uqr_user_completed ON user_quiz_results(user_id, completed_at DESC)
+    INCLUDE (quiz_type, percentage, section);
+CREATE INDEX IF NOT EXISTS idx_uss_user_started ON user_study_sessions(user_id, started_at DESC)
+    INCLUDE (duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_ufp_user_section ON user_flashcard_progress(user_id, section)
+    INCLUDE (cards_viewed);
+
+-- Aggregate a user's quiz totals and average score server-side so the profile
+-- statistics receive one row instead of every result. Runs as the caller, so
+-- the RLS policies below still apply.
+CREATE OR REPLACE FUNCTION user_quiz_statistics(
+    p_user_id UUID
+)
+RETURNS TABLE (total_quizzes BIGINT, total_practice_tests BIGINT, average_score NUMERIC) AS $$
+    SELECT COUNT(*) FILTER (WHERE quiz_type <> 'practice_test'),
+           COUNT(*) FILTER (WHERE quiz_type = 'practice_test'),
+           COALESCE(AVG(percentage), 0)
+    FROM user_quiz_results
+    WHERE user_id = p_user_id;
+$$ LANGUAGE sql STABLE;
+
 -- Enable Row Level Security (RLS) for all tables
 ALTER TABLE user_quiz_results ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_flashcard_progress ENABLE ROW LEVEL SECURITY;
@@ -174,6 +174,7 @@ class FlashcardService:
             total_cards = 0
             deck_names = section_data.get('deck_names', [])
             tags = section_data.get('tags', [])
+            tag_set = frozenset(tags)
             
             logger.info(f"Section {section_num}: Trying deck names {deck_names}")
             
@@ -193,7 +194,7 @@ class FlashcardService:
                 for flashcard in all_flashcards:
                     flashcard_tags = flashcard.get('tags', [])
                     if isinstance(flashcard_tags, list):
-                        if any(tag in flashcard_tags for tag in tags):
+                        if not tag_set.isdisjoint(flashcard_tags):
                             matched_flashcards.append(flashcard)
                     elif isinstance(flashcard_tags, str):
                         if any(tag in flashcard_tags for tag in tags):
@@ -234,6 +235,7 @@ class FlashcardService:
             section_data = self.SECTION_CATEGORIES[section]
             deck_names = section_data.get('deck_names', [])
             tags = section_data.get('tags', [])
+            tag_set = frozenset(tags)
             
             # Try to get flashcards by deck name first
             flashcards = []
@@ -250,7 +252,7 @@ class FlashcardService:
                 for flashcard in all_flashcards:
                     flashcard_tags = flashcard.get('tags', [])
                     if isinstance(flashcard_tags, list):
-                        if any(tag in flashcard_tags for tag in tags):
+                        if not tag_set.isdisjoint(flashcard_tags):
                             flashcards.append(flashcard)
                     elif isinstance(flashcard_tags, str):
                         if any(tag in flashcard_tags for tag in tags):
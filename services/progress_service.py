@@ -3,14 +3,17 @@ Progress Tracking Service - Handles user progress tracking using Supabase
 """
 import os
 import sys
+import time
 import logging
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
+    import httpx
     from supabase import create_client, Client
     from config import Config
 except ImportError as e:
@@ -20,19 +23,47 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Raised before a request reaches the server, so retrying them cannot duplicate an insert
+_PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Network failures that may succeed on a second try; only idempotent writes retry these
+_TRANSIENT_ERRORS = (httpx.TransportError,)
+
+# Connection settings are resolved once per process and shared by every ProgressService
+_CONFIG = Config()
+_SUPABASE_URL = os.environ.get('SUPABASE_URL', _CONFIG.SUPABASE_URL)
+_SUPABASE_KEY = os.environ.get('SUPABASE_KEY', _CONFIG.SUPABASE_KEY)
+_SHARED_CLIENT: Optional[Client] = None
+
+def _get_shared_client() -> Client:
+    """Return the process-wide anonymous Supabase client, creating it on first use"""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        _SHARED_CLIENT = create_client(_SUPABASE_URL, _SUPABASE_KEY)
+    return _SHARED_CLIENT
+
 class ProgressService:
     """Service class for tracking user progress in Supabase"""
     
+    # Columns rendered by the dashboard's recent quiz table
+    # (id is included as the tie-breaker in the history cursor)
+    QUIZ_HISTORY_COLUMNS = 'id, quiz_id, quiz_type, section, percentage, duration_seconds, completed_at'
+    
+    # Background write settings for the *_async save methods
+    BACKGROUND_WORKERS = 4
+    BACKGROUND_MAX_ATTEMPTS = 3
+    BACKGROUND_BACKOFF_SECONDS = 0.5
+    
     def __init__(self):
         """Initialize Supabase client for progress tracking"""
-        config = Config()
-        self.supabase_url = os.environ.get('SUPABASE_URL', config.SUPABASE_URL)
-        self.supabase_key = os.environ.get('SUPABASE_KEY', config.SUPABASE_KEY)
+        self.supabase_url = _SUPABASE_URL
+        self.supabase_key = _SUPABASE_KEY
         
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL and API key are required")
         
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        self.client: Client = _get_shared_client()
+        self._executor = ThreadPoolExecutor(max_workers=self.BACKGROUND_WORKERS, thread_name_prefix='progress-writer')
         logger.info("ProgressService initialized with Supabase")
 
     def _get_client(self, access_token: Optional[str] = None, refresh_token: Optional[str] = None) -> Client:
@@ -77,11 +108,12 @@ class ProgressService:
                 'score': quiz_result.get('score', 0),
                 'total_questions': quiz_result.get('total_questions', 0),
                 'percentage': float(quiz_result.get('percentage', 0)),
-                'duration_seconds': quiz_result.get('duration_seconds'),
-                'completed_at': datetime.utcnow().isoformat()
+                'duration_seconds': quiz_result.get('duration_seconds')
+                # completed_at is filled in by the column default (NOW())
             }
             
-            result = client.table('user_quiz_results').insert(data).execute()
+            # Upsert on (user_id, quiz_id) so a retried or repeated save never adds a second row
+            result = client.table('user_quiz_results').upsert(data, on_conflict='user_id,quiz_id').execute()
             
             if result.data:
                 logger.info(f"Saved quiz result for user {user_id}: {quiz_result.get('quiz_type')}")
@@ -93,7 +125,8 @@ class ProgressService:
             else:
                 return {
                     'success': False,
-                    'error': 'Failed to save quiz result'
+                    'error': 'Failed to save quiz result',
+                    'retryable': False
                 }
         
         except Exception as e:
@@ -101,26 +134,93 @@ class ProgressService:
             logger.error(f"Error saving quiz result: {error_msg}")
             return {
                 'success': False,
-                'error': f'Failed to save quiz result: {error_msg}'
+                'error': f'Failed to save quiz result: {error_msg}',
+                # The upsert is idempotent, so network failures can be retried; errors the server
+                # returned (auth/RLS, bad data, a missing unique index) would only fail again
+                'retryable': isinstance(e, _TRANSIENT_ERRORS)
             }
     
-    def get_user_quiz_history(self, user_id: str, limit: int = 10, access_token: str = None, refresh_token: str = None) -> List[Dict[str, Any]]:
+    def _save_with_retry(self, description: str, save_func, *args, **kwargs) -> Dict[str, Any]:
         """
-        Get recent quiz results for a user
+        Run a save method on the background executor, retrying with exponential backoff
+        
+        Only results marked 'retryable' are retried: idempotent upserts that hit
+        a network error, or inserts that failed before the request was sent.
+        """
+        result = {'success': False, 'error': 'Not attempted'}
+        for attempt in range(1, self.BACKGROUND_MAX_ATTEMPTS + 1):
+            result = save_func(*args, **kwargs)
+            if result.get('success'):
+                return result
+            if not result.get('retryable'):
+                break
+            if attempt < self.BACKGROUND_MAX_ATTEMPTS:
+                delay = self.BACKGROUND_BACKOFF_SECONDS * (2 ** (attempt - 1))
+                logger.warning(f"Retrying {description} in {delay}s (attempt {attempt} failed: {result.get('error')})")
+                time.sleep(delay)
+        logger.error(f"Giving up on {description} after {attempt} attempt(s): {result.get('error')}")
+        return result
+    
+    def _submit_background(self, description: str, save_func, *args, **kwargs) -> Future:
+        """Queue a save on the background executor"""
+        return self._executor.submit(self._save_with_retry, description, save_func, *args, **kwargs)
+    
+    def save_quiz_result_async(self, user_id: str, quiz_result: Dict[str, Any], access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
+        """
+        Queue a quiz result save without waiting for the database round trip
+        
+        Use save_quiz_result() when the caller needs confirmation of the write.
+        
+        Returns:
+            Dict with 'success' bool and 'message' (the write is only accepted, not confirmed)
+        """
+        self._submit_background('quiz result save', self.save_quiz_result,
+                                user_id, quiz_result, access_token=access_token, refresh_token=refresh_token)
+        return {'success': True, 'message': 'Quiz result queued for saving'}
+    
+    def save_flashcard_progress_async(self, user_id: str, section: int, cards_viewed: int = 1, session_id: str = None, access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
+        """Queue a flashcard progress insert without waiting for the database round trip"""
+        self._submit_background('flashcard progress save', self.save_flashcard_progress,
+                                user_id, section, cards_viewed=cards_viewed, session_id=session_id,
+                                access_token=access_token, refresh_token=refresh_token)
+        return {'success': True, 'message': 'Flashcard progress queued for saving'}
+    
+    def save_study_session_async(self, user_id: str, session_type: str, duration_seconds: int, section: int = None, access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
+        """Queue a study session insert without waiting for the database round trip"""
+        self._submit_background('study session save', self.save_study_session,
+                                user_id, session_type, duration_seconds, section=section,
+                                access_token=access_token, refresh_token=refresh_token)
+        return {'success': True, 'message': 'Study session queued for saving'}
+    
+    def get_user_quiz_history(self, user_id: str, limit: int = 10, access_token: str = None, refresh_token: str = None, before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent quiz results for a user, newest first (ties broken by id)
         
         Args:
             user_id: User UUID
             limit: Maximum number of results to return
+            before: Optional (completed_at, id) cursor; only rows after it in the ordering are returned.
+                    Pass the last row's (completed_at, id) to fetch the next page (keyset pagination).
+                    Both parts are needed because results saved together share a completed_at.
         
         Returns:
             List of quiz result dictionaries
         """
         try:
             client = self._get_client(access_token, refresh_token)
-            result = client.table('user_quiz_results')\
-                .select('*')\
-                .eq('user_id', user_id)\
+            query = client.table('user_quiz_results')\
+                .select(self.QUIZ_HISTORY_COLUMNS)\
+                .eq('user_id', user_id)
+            if before:
+                completed_at, row_id = before
+                # Round-trip the timestamp so quotes, commas or parentheses cannot reach the filter
+                completed_at = datetime.fromisoformat(str(completed_at)).isoformat()
+                query = query.or_(
+                    f'completed_at.lt."{completed_at}",and(completed_at.eq."{completed_at}",id.lt.{int(row_id)})'
+                )
+            result = query\
                 .order('completed_at', desc=True)\
+                .order('id', desc=True)\
                 .limit(limit)\
                 .execute()
             
@@ -130,6 +230,32 @@ class ProgressService:
             logger.error(f"Error getting user quiz history: {e}")
             return []
     
+    def get_quiz_detail(self, user_id: str, quiz_id: str, access_token: str = None, refresh_token: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the full stored row for a single quiz result
+        
+        Args:
+            user_id: User UUID
+            quiz_id: Quiz session identifier
+        
+        Returns:
+            Quiz result dictionary or None if not found
+        """
+        try:
+            client = self._get_client(access_token, refresh_token)
+            result = client.table('user_quiz_results')\
+                .select('*')\
+                .eq('user_id', user_id)\
+                .eq('quiz_id', quiz_id)\
+                .limit(1)\
+                .execute()
+            
+            return result.data[0] if result.data else None
+        
+        except Exception as e:
+            logger.error(f"Error getting quiz detail: {e}")
+            return None
+    
     def get_user_statistics(self, user_id: str, access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
         """
         Get aggregated statistics for a user
@@ -141,25 +267,12 @@ class ProgressService:
             Dict with total_quizzes, total_flashcards, total_practice_tests, average_score, total_study_time
         """
         try:
-            # Get quiz results
             client = self._get_client(access_token, refresh_token)
             try:
-                quiz_results = client.table('user_quiz_results')\
-                    .select('*')\
-                    .eq('user_id', user_id)\
-                    .execute()
-                quizzes = quiz_results.data if quiz_results.data else []
+                total_quizzes, total_practice_tests, average_score = self._query_quiz_statistics(client, user_id)
             except Exception as e:
                 logger.warning(f"Error querying user_quiz_results table: {e}. Table may not exist yet.")
-                quizzes = []
-            
-            # Calculate statistics
-            total_quizzes = len([q for q in quizzes if q.get('quiz_type') != 'practice_test'])
-            total_practice_tests = len([q for q in quizzes if q.get('quiz_type') == 'practice_test'])
-            
-            # Calculate average score
-            scores = [q.get('percentage', 0) for q in quizzes if q.get('percentage') is not None]
-            average_score = sum(scores) / len(scores) if scores else 0
+                total_quizzes, total_practice_tests, average_score = 0, 0, 0
             
             # Get flashcard progress
             try:
@@ -207,6 +320,35 @@ class ProgressService:
                 'total_study_time_hours': 0
             }
     
+    def _query_quiz_statistics(self, client: Client, user_id: str) -> Tuple[int, int, float]:
+        """
+        Return (total_quizzes, total_practice_tests, average_score) for a user
+        
+        Uses the user_quiz_statistics SQL function so the database counts and
+        averages and a single row crosses the wire. If the function has not been
+        created yet, falls back to one query over quiz_type and percentage.
+        """
+        try:
+            result = client.rpc('user_quiz_statistics', {'p_user_id': user_id}).execute()
+            row = result.data[0] if result.data else {}
+            return (
+                int(row.get('total_quizzes') or 0),
+                int(row.get('total_practice_tests') or 0),
+                float(row.get('average_score') or 0)
+            )
+        except Exception as e:
+            logger.warning(f"user_quiz_statistics RPC unavailable, aggregating client-side: {e}")
+        
+        result = client.table('user_quiz_results')\
+            .select('quiz_type, percentage')\
+            .eq('user_id', user_id)\
+            .execute()
+        quizzes = result.data if result.data else []
+        total_practice_tests = sum(1 for q in quizzes if q.get('quiz_type') == 'practice_test')
+        scores = [q['percentage'] for q in quizzes if q.get('percentage') is not None]
+        average_score = sum(scores) / len(scores) if scores else 0
+        return len(quizzes) - total_practice_tests, total_practice_tests, average_score
+    
     def get_section_progress(self, user_id: str, access_token: str = None, refresh_token: str = None) -> Dict[int, Dict[str, Any]]:
         """
         Get progress breakdown by section (1-5)
@@ -325,8 +467,8 @@ class ProgressService:
                 'user_id': user_id,
                 'section': section,
                 'cards_viewed': cards_viewed,
-                'session_id': session_id,
-                'viewed_at': datetime.utcnow().isoformat()
+                'session_id': session_id
+                # viewed_at is filled in by the column default (NOW())
             }
             
             result = client.table('user_flashcard_progress').insert(data).execute()
@@ -348,9 +490,66 @@ class ProgressService:
             logger.error(f"Error saving flashcard progress: {error_msg}")
             return {
                 'success': False,
-                'error': f'Failed to save flashcard progress: {error_msg}'
+                'error': f'Failed to save flashcard progress: {error_msg}',
+                # A plain insert is only safe to retry if it never reached the server
+                'retryable': isinstance(e, _PRE_SEND_ERRORS)
             }
     
+    def save_flashcard_progress_batch(self, user_id: str, events: List[Dict[str, Any]], access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
+        """
+        Save several flashcard progress events with a single bulk insert
+
+        Args:
+            user_id: User UUID
+            events: List of dicts with section, optional cards_viewed (default 1) and session_id
+            access_token: Optional access token for authentication (for RLS)
+            refresh_token: Optional refresh token (required if access_token is provided)
+
+        Returns:
+            Dict with 'success' bool, 'saved' count and 'message' or 'error'
+        """
+        try:
+            rows = [
+                {
+                    'user_id': user_id,
+                    'section': event['section'],
+                    'cards_viewed': event.get('cards_viewed', 1),
+                    'session_id': event.get('session_id')
+                }
+                for event in events
+            ]
+            if not rows:
+                return {
+                    'success': True,
+                    'saved': 0,
+                    'message': 'No flashcard progress to save'
+                }
+
+            # Use authenticated client for RLS
+            client = self._get_client(access_token, refresh_token)
+            result = client.table('user_flashcard_progress').insert(rows).execute()
+
+            if result.data:
+                logger.info(f"Saved {len(rows)} flashcard progress events for user {user_id}")
+                return {
+                    'success': True,
+                    'saved': len(rows),
+                    'message': 'Flashcard progress saved successfully'
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Failed to save flashcard progress'
+                }
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Error saving flashcard progress batch: {error_msg}")
+            return {
+                'success': False,
+                'error': f'Failed to save flashcard progress: {error_msg}'
+            }
+
     def save_study_session(self, user_id: str, session_type: str, duration_seconds: int, 
                           section: int = None, started_at: datetime = None, ended_at: datetime = None,
                           access_token: str = None, refresh_token: str = None) -> Dict[str, Any]:
@@ -407,7 +606,9 @@ class ProgressService:
             logger.error(f"Error saving study session: {error_msg}")
             return {
                 'success': False,
-                'error': f'Failed to save study session: {error_msg}'
+                'error': f'Failed to save study session: {error_msg}',
+                # A plain insert is only safe to retry if it never reached the server
+                'retryable': isinstance(e, _PRE_SEND_ERRORS)
             }
     
     def get_performance_trends(self, user_id: str, days: int = 30, access_token: str = None, refresh_token: str = None) -> List[Dict[str, Any]]:
@@ -456,8 +657,10 @@ except Exception as e:
                 'total_study_time_seconds': 0,
                 'total_study_time_hours': 0
             }
-        def get_user_quiz_history(self, user_id, limit=10, access_token=None, refresh_token=None):
+        def get_user_quiz_history(self, user_id, limit=10, access_token=None, refresh_token=None, before=None):
             return []
+        def get_quiz_detail(self, user_id, quiz_id, access_token=None, refresh_token=None):
+            return None
         def get_section_progress(self, user_id, access_token=None, refresh_token=None):
             return {}
         def get_study_time(self, user_id, days=30, access_token=None, refresh_token=None):
@@ -474,7 +677,15 @@ except Exception as e:
             return {'success': False, 'error': 'Database tables not initialized'}
         def save_flashcard_progress(self, user_id, section, cards_viewed=1, session_id=None, access_token=None, refresh_token=None):
             return {'success': False, 'error': 'Database tables not initialized'}
+        def save_flashcard_progress_batch(self, user_id, events, access_token=None, refresh_token=None):
+            return {'success': False, 'error': 'Database tables not initialized'}
         def save_study_session(self, user_id, session_type, duration_seconds, section=None, started_at=None, ended_at=None, access_token=None, refresh_token=None):
             return {'success': False, 'error': 'Database tables not initialized'}
+        def save_quiz_result_async(self, user_id, quiz_result, access_token=None, refresh_token=None):
+            return {'success': False, 'error': 'Database tables not initialized'}
+        def save_flashcard_progress_async(self, user_id, section, cards_viewed=1, session_id=None, access_token=None, refresh_token=None):
+            return {'success': False, 'error': 'Database tables not initialized'}
+        def save_study_session_async(self, user_id, session_type, duration_seconds, section=None, access_token=None, refresh_token=None):
+            return {'success': False, 'error': 'Database tables not initialized'}
     progress_service = DummyProgressService()
 
@@ -2,11 +2,13 @@
 Quiz Service - Handles quiz operations and database interactions
 Organized by CompTIA Security+ SY0-701 Exam Domains (5 Sections)
 """
-import json
 import random
-from typing import List, Dict, Any, Optional
-from database.question_manager import question_manager
-from utils.quiz_logic import quiz_manager, QuizSession
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from database.question_manager import question_manager, parse_question_json_fields
+from utils.quiz_logic import quiz_manager, QuizSession, reservoir_sample
 import logging
 
 logger = logging.getLogger(__name__)
@@ -92,18 +94,104 @@ class QuizService:
         }
     }
     
+    # Inverted index: each category belongs to the first section that lists it,
+    # and each section iterates only the categories it owns (as immutable tuples)
+    CATEGORY_TO_SECTION: Dict[str, int] = {}
+    SECTION_ALL_CATEGORIES: Dict[int, Tuple[str, ...]] = {}
+    for _section, _data in SECTION_CATEGORIES.items():
+        _owned = []
+        for _category in _data['categories']:
+            if _category not in CATEGORY_TO_SECTION:
+                CATEGORY_TO_SECTION[_category] = _section
+                _owned.append(_category)
+        SECTION_ALL_CATEGORIES[_section] = tuple(_owned)
+    del _section, _data, _owned, _category
+    
+    # How long a memoized question pool is reused before being re-queried
+    POOL_CACHE_TTL_SECONDS = 300
+    
+    # PostgREST's default max-rows; larger section pools would be truncated server-side
+    POOL_MAX_ROWS = 1000
+    
     def __init__(self):
         self.question_manager = question_manager
+        # Memoize pool fetches; the key includes the question-bank version and a TTL window
+        self._fetch_pool = lru_cache(maxsize=64)(self._fetch_category_pool)
+        # One long-lived pool for concurrent section fetches instead of a new executor per practice test
+        self._pool_executor = ThreadPoolExecutor(max_workers=len(self.SECTION_CATEGORIES),
+                                                 thread_name_prefix='section-pool')
+    
+    def _fetch_category_pool(self, categories: Tuple[str, ...], difficulty: Optional[str], limit: int,
+                             version: int, ttl_window: int) -> tuple:
+        """
+        Fetch the question pool for one or more categories in a single query (memoized via self._fetch_pool)
+        
+        Multi-category (section) pools are a random sample drawn by the
+        database, so every category is represented in proportion to its size
+        rather than the newest rows filling the limit.
+        
+        version and ttl_window are only part of the cache key: a write through
+        the question manager or the end of the TTL window forces a new fetch.
+        """
+        if len(categories) == 1:
+            questions = self.question_manager.get_questions(
+                category=categories[0],
+                difficulty=difficulty,
+                limit=limit
+            )
+        else:
+            questions = self.question_manager.get_random_questions(
+                min(limit, self.POOL_MAX_ROWS),
+                difficulty=difficulty,
+                categories=list(categories)
+            )
+        if not questions:
+            # Raise instead of returning so empty (possibly failed) fetches are not cached
+            raise LookupError(categories)
+        return tuple(questions)
+    
+    def _get_category_pool(self, category: str, difficulty: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Return fresh copies of the cached pool so sessions can mutate their questions"""
+        return self._get_pool((category,), difficulty, limit)
+    
+    def _get_section_pool(self, section: int, difficulty: Optional[str], per_category_limit: int) -> tuple:
+        """
+        Return the shared (uncopied) pool for every category in a section, sampled at random in one query
+        
+        Callers sample from this and copy only the questions they keep.
+        """
+        categories = self.SECTION_ALL_CATEGORIES[section]
+        return self._get_raw_pool(categories, difficulty, per_category_limit * len(categories))
+    
+    def _get_raw_pool(self, categories: Tuple[str, ...], difficulty: Optional[str], limit: int) -> tuple:
+        """Return the memoized pool, or () when it is empty"""
+        ttl_window = int(time.monotonic() // self.POOL_CACHE_TTL_SECONDS)
+        try:
+            return self._fetch_pool(categories, difficulty, limit, self.question_manager.version, ttl_window)
+        except LookupError:
+            return ()
+    
+    def _get_pool(self, categories: Tuple[str, ...], difficulty: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Copy questions out of the memoized pool, or return [] when the pool is empty"""
+        return [dict(question) for question in self._get_raw_pool(categories, difficulty, limit)]
+    
+    def clear_question_cache(self):
+        """Drop memoized category pools now (e.g. after editing questions outside this process)"""
+        self._fetch_pool.cache_clear()
+    
+    def invalidate_counts_cache(self):
+        """Drop cached per-category question counts, e.g. after an admin edits questions"""
+        self.question_manager.invalidate_counts_cache()
     
     def get_all_sections(self) -> List[Dict[str, Any]]:
         """Get all available sections with their details"""
         sections = []
+        counts = self.question_manager.get_counts_by_category()
         for section_num, section_data in self.SECTION_CATEGORIES.items():
             # Count total questions in this section
             total_questions = 0
-            for category in section_data['categories']:
-                count = self.question_manager.get_question_count(category=category)
-                total_questions += count
+            for category in self.SECTION_ALL_CATEGORIES[section_num]:
+                total_questions += counts.get(category, 0)
             
             sections.append({
                 'section_number': section_num,
@@ -123,35 +211,24 @@ class QuizService:
                 return None
             
             section_data = self.SECTION_CATEGORIES[section]
-            categories = section_data['categories']
             
-            # Get questions from all categories in this section
-            all_questions = []
-            for category in categories:
-                questions = self.question_manager.get_questions(
-                    category=category,
-                    difficulty=difficulty,
-                    limit=100  # Get more questions to have a good pool
-                )
-                all_questions.extend(questions)
+            # Get a good pool of questions from all categories in this section
+            pool = self._get_section_pool(section, difficulty, 100)
             
-            if not all_questions:
+            if not pool:
                 logger.warning(f"No questions found for section {section}")
                 return None
             
-            # Shuffle and limit to requested number
-            random.shuffle(all_questions)
-            all_questions = all_questions[:limit]
-            
-            # Parse JSON fields in questions
-            all_questions = self._parse_question_json_fields(all_questions)
+            # Sample the requested number (already in random order), copying only the questions kept
+            all_questions = [dict(question) for question in random.sample(pool, min(limit, len(pool)))]
             
             # Create quiz session
             quiz_id = quiz_manager.create_quiz_session('section_quiz', section)
             session = quiz_manager.get_session(quiz_id)
             session.add_questions(all_questions)
+            quiz_manager.save_session(session)
             
-            logger.info(f"Created section quiz for section {section} ({section_data['name']}) with {len(all_questions)} questions")
+            logger.info("Created section quiz for section %d (%s) with %d questions", section, section_data['name'], len(all_questions))
             return quiz_id
             
         except Exception as e:
@@ -162,19 +239,12 @@ class QuizService:
         """Create a quiz for a specific category"""
         try:
             # Get questions for this category
-            questions = self.question_manager.get_questions(
-                category=category,
-                difficulty=difficulty,
-                limit=limit
-            )
+            questions = self._get_category_pool(category, difficulty, limit)
             
             if not questions:
                 logger.warning(f"No questions found for category: {category}")
                 return None
             
-            # Parse JSON fields in questions
-            questions = self._parse_question_json_fields(questions)
-            
             # Shuffle questions
             random.shuffle(questions)
             
@@ -182,8 +252,9 @@ class QuizService:
             quiz_id = quiz_manager.create_quiz_session('category_quiz', category)
             session = quiz_manager.get_session(quiz_id)
             session.add_questions(questions)
+            quiz_manager.save_session(session)
             
-            logger.info(f"Created category quiz for '{category}' with {len(questions)} questions")
+            logger.info("Created category quiz for '%s' with %d questions", category, len(questions))
             return quiz_id
             
         except Exception as e:
@@ -193,35 +264,60 @@ class QuizService:
     def create_random_quiz(self, limit: int = 10, difficulty: str = None) -> Optional[str]:
         """Create a random quiz from all categories"""
         try:
-            # Get random questions from all categories
-            questions = self.question_manager.get_questions(
-                difficulty=difficulty,
-                limit=limit * 3  # Get more questions to shuffle from
-            )
+            # Get random questions from all categories, already shuffled by the database
+            questions = self.question_manager.get_random_questions(limit, difficulty=difficulty)
             
             if not questions:
                 logger.warning("No questions found for random quiz")
                 return None
             
-            # Parse JSON fields in questions
-            questions = self._parse_question_json_fields(questions)
-            
-            # Shuffle and limit
-            random.shuffle(questions)
-            questions = questions[:limit]
-            
             # Create quiz session
             quiz_id = quiz_manager.create_quiz_session('random_quiz')
             session = quiz_manager.get_session(quiz_id)
             session.add_questions(questions)
+            quiz_manager.save_session(session)
             
-            logger.info(f"Created random quiz with {len(questions)} questions")
+            logger.info("Created random quiz with %d questions", len(questions))
             return quiz_id
             
         except Exception as e:
             logger.error(f"Error creating random quiz: {e}")
             return None
     
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _allocate_counts(question_count: int, sections: Tuple[int, ...]) -> Tuple[Tuple[int, int], ...]:
+        """Split question_count across sections by PRACTICE_WEIGHTS using the largest remainder method
+
+        Returns:
+            Tuple of (section, count) pairs, or () if the sections carry no weight
+        """
+        weights = QuizService.PRACTICE_WEIGHTS
+        total_weight = sum(weights.get(s, 0) for s in sections)
+        if total_weight == 0:
+            return ()
+
+        base_allocations = {}
+        int_counts = {}
+        for s in sections:
+            weight = weights.get(s, 0) / total_weight
+            desired = weight * question_count
+            base_allocations[s] = desired
+            int_counts[s] = int(desired)
+
+        remainder = question_count - sum(int_counts.values())
+        if remainder > 0:
+            # Distribute remaining questions to sections with largest fractional parts
+            fractional_order = sorted(
+                ((s, base_allocations[s] - int_counts[s]) for s in sections),
+                key=lambda x: x[1],
+                reverse=True
+            )
+            for i in range(remainder):
+                int_counts[fractional_order[i % len(fractional_order)][0]] += 1
+
+        return tuple((s, int_counts[s]) for s in sections)
+
     def create_full_practice_test(self, difficulty: str = None) -> Optional[str]:
         """Legacy helper: create a 90-question practice test using default weights."""
         return self.create_practice_test(question_count=90, sections=None, difficulty=difficulty)
@@ -236,69 +332,50 @@ class QuizService:
         """
         try:
             selected_sections = sections or list(self.SECTION_CATEGORIES.keys())
-            selected_sections = [s for s in selected_sections if s in self.SECTION_CATEGORIES]
+            # Drop unknown and repeated sections so no section pool is weighted or queried twice
+            selected_sections = [s for s in dict.fromkeys(selected_sections) if s in self.SECTION_CATEGORIES]
             if not selected_sections:
                 logger.error("No valid sections selected for practice test")
                 return None
 
-            # Compute weighted allocation using largest remainder method
-            total_weight = sum(self.PRACTICE_WEIGHTS.get(s, 0) for s in selected_sections)
-            if total_weight == 0:
+            # Weighted allocation (memoized per question_count/sections combination)
+            allocation = self._allocate_counts(question_count, tuple(selected_sections))
+            if not allocation:
                 logger.error("Total weight is zero; check PRACTICE_WEIGHTS configuration")
                 return None
+            int_counts = dict(allocation)
 
-            base_allocations = {}
-            int_counts = {}
-            for s in selected_sections:
-                weight = self.PRACTICE_WEIGHTS.get(s, 0) / total_weight
-                desired = weight * question_count
-                base_allocations[s] = desired
-                int_counts[s] = int(desired)
-
-            remainder = question_count - sum(int_counts.values())
-            if remainder > 0:
-                # Distribute remaining questions to sections with largest fractional parts
-                fractional_order = sorted(
-                    ((s, base_allocations[s] - int_counts[s]) for s in selected_sections),
-                    key=lambda x: x[1],
-                    reverse=True
-                )
-                for i in range(remainder):
-                    int_counts[fractional_order[i % len(fractional_order)][0]] += 1
+            # Collect questions per section into a list preallocated to the final size
+            all_questions: List[Optional[Dict[str, Any]]] = [None] * question_count
+            write_idx = 0
 
-            # Collect questions per section
-            all_questions: List[Dict[str, Any]] = []
-            leftover_pool: List[Dict[str, Any]] = []
+            # Fetch every section's pool concurrently; each is an independent network round trip
+            active_sections = [s for s in selected_sections if int_counts.get(s, 0) > 0]
+            section_pools: List[tuple] = list(self._pool_executor.map(
+                lambda s: self._get_section_pool(s, difficulty, 200), active_sections
+            ))
 
-            for section_num in selected_sections:
-                take_count = int_counts.get(section_num, 0)
-                if take_count <= 0:
-                    continue
+            for section_num, section_pool in zip(active_sections, section_pools):
+                take_count = int_counts[section_num]
 
-                section_data = self.SECTION_CATEGORIES[section_num]
-                categories = section_data['categories']
+                # take what we can for this section
+                chosen = random.sample(section_pool, min(take_count, len(section_pool)))
+                all_questions[write_idx:write_idx + len(chosen)] = chosen
+                write_idx += len(chosen)
 
-                section_questions: List[Dict[str, Any]] = []
-                for category in categories:
-                    questions = self.question_manager.get_questions(
-                        category=category,
-                        difficulty=difficulty,
-                        limit=200  # gather a healthy pool
-                    )
-                    section_questions.extend(questions)
+            # If not enough questions collected, top up from the questions no section kept
+            if write_idx < question_count:
+                chosen_ids = {id(question) for question in all_questions[:write_idx]}
+                leftover_pool = (question for pool in section_pools for question in pool
+                                 if id(question) not in chosen_ids)
+                chosen = reservoir_sample(leftover_pool, question_count - write_idx)
+                all_questions[write_idx:write_idx + len(chosen)] = chosen
+                write_idx += len(chosen)
+            del all_questions[write_idx:]
 
-                random.shuffle(section_questions)
-                # Take what we can for this section; keep extras for leftover fill
-                chosen = section_questions[:take_count]
-                all_questions.extend(chosen)
-                if len(section_questions) > take_count:
-                    leftover_pool.extend(section_questions[take_count:])
-
-            # If not enough questions collected, top up from leftovers
-            if len(all_questions) < question_count and leftover_pool:
-                random.shuffle(leftover_pool)
-                needed = question_count - len(all_questions)
-                all_questions.extend(leftover_pool[:needed])
+            # Copy only the kept questions out of the shared pools
+            for i in range(write_idx):
+                all_questions[i] = dict(all_questions[i])
 
             if not all_questions:
                 # Fallback: pull random questions from entire pool so users can still practice
@@ -315,22 +392,18 @@ class QuizService:
                     logger.warning("Global random pool also empty; cannot create practice test")
                     return None
 
-                all_questions = fallback_questions
+                all_questions = random.sample(fallback_questions, min(question_count, len(fallback_questions)))
 
-            # Parse and shuffle
-            all_questions = self._parse_question_json_fields(all_questions)
+            # Shuffle presentation order; the list already holds at most question_count questions
             random.shuffle(all_questions)
 
-            # Trim to requested total
-            if len(all_questions) > question_count:
-                all_questions = all_questions[:question_count]
-
             quiz_id = quiz_manager.create_quiz_session('practice_test')
             session = quiz_manager.get_session(quiz_id)
             session.add_questions(all_questions)
+            quiz_manager.save_session(session)
 
             logger.info(
-                f"Created practice test with {len(all_questions)} questions across sections {selected_sections}"
+                "Created practice test with %d questions across sections %s", len(all_questions), selected_sections
             )
             return quiz_id
 
@@ -346,18 +419,29 @@ class QuizService:
                 logger.error(f"Quiz session not found: {quiz_id}")
                 return None
             
-            # Set current question index (0-based)
-            session.current_question_index = question_number - 1
+            total = session.total_questions
+            if not total:
+                logger.error(f"Quiz session has no questions: {quiz_id}")
+                return {"error": "Quiz has no questions"}
+            
+            # Set current question index (0-based); refreshes of the same question skip the write
+            index = question_number - 1
+            if session.current_question_index != index:
+                session.current_question_index = index
+                quiz_manager.save_session(session, fields=('current_question_index',))
             
             question = session.get_current_question()
-            if question:
-                # Add quiz metadata
-                question['quiz_id'] = quiz_id
-                question['question_number'] = question_number
-                question['total_questions'] = session.total_questions
-                question['progress_percentage'] = (question_number / session.total_questions) * 100
-                
-            return question
+            if not question:
+                return question
+            
+            # Return a copy with quiz metadata so the stored question is not mutated
+            return {
+                **question,
+                'quiz_id': quiz_id,
+                'question_number': question_number,
+                'total_questions': total,
+                'progress_percentage': (question_number / total) * 100
+            }
             
         except Exception as e:
             logger.error(f"Error getting quiz question: {e}")
@@ -379,14 +463,18 @@ class QuizService:
             # Submit the answer
             result = session.submit_answer(answer, str(current_question.get('id', '')))
             if 'error' in result:
-                logger.error(f"Submit error for quiz {quiz_id}: {result['error']}")
+                logger.error("Submit error for quiz %s: %s", quiz_id, result['error'])
                 return None
+            quiz_manager.save_session(session, fields=QuizSession.ANSWER_FIELDS)
             
             # Add additional metadata
-            result['question_number'] = session.current_question_index + 1
-            result['total_questions'] = session.total_questions
-            result['has_next_question'] = session.current_question_index + 1 < session.total_questions
-            result['quiz_completed'] = session.current_question_index + 1 >= session.total_questions
+            question_number = session.current_question_index + 1
+            total = session.total_questions
+            result['question_number'] = question_number
+            result['total_questions'] = total
+            has_next_question = question_number < total
+            result['has_next_question'] = has_next_question
+            result['quiz_completed'] = not has_next_question
             
             return result
             
@@ -402,7 +490,12 @@ class QuizService:
                 logger.error(f"Quiz session not found: {quiz_id}")
                 return None
             
-            return session.get_quiz_results()
+            # Only the first call stamps the end time, so later calls skip the write
+            first_call = session.end_time is None
+            results = session.get_quiz_results()
+            if first_call:
+                quiz_manager.save_session(session, fields=('completed', 'end_time'))
+            return results
             
         except Exception as e:
             logger.error(f"Error getting quiz results: {e}")
@@ -426,29 +519,35 @@ class QuizService:
         """Clean up a quiz session"""
         quiz_manager.cleanup_session(quiz_id)
     
-    def get_section_info(self, section: int) -> Optional[Dict[str, Any]]:
-        """Get detailed information about a specific section"""
+    def get_section_info(self, section: int, counts: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get detailed information about a specific section
+        
+        Args:
+            section: Section number (1-5)
+            counts: Optional category -> question count map from
+                    question_manager.get_counts_by_category(); fetched if omitted
+        """
         if section not in self.SECTION_CATEGORIES:
             return None
         
-        section_data = self.SECTION_CATEGORIES[section]
-        
-        # Count questions per category in this section
-        category_breakdown = []
-        total_questions = 0
-        for category in section_data['categories']:
-            count = self.question_manager.get_question_count(category=category)
-            total_questions += count
-            category_breakdown.append({
-                'category': category,
-                'question_count': count
-            })
+        if counts is None:
+            counts = self.question_manager.get_counts_by_category()
         
+        return self._build_section_info(section, self.SECTION_CATEGORIES[section], counts)
+    
+    @staticmethod
+    def _build_section_info(section: int, section_data: Dict[str, Any], counts: Dict[str, int]) -> Dict[str, Any]:
+        """Assemble a section's details from a category -> question count map"""
+        category_breakdown = [
+            {'category': category, 'question_count': counts.get(category, 0)}
+            for category in QuizService.SECTION_ALL_CATEGORIES[section]
+        ]
         return {
             'section_number': section,
             'name': section_data['name'],
             'description': section_data['description'],
-            'total_questions': total_questions,
+            'total_questions': sum(item['question_count'] for item in category_breakdown),
             'categories': section_data['categories'],
             'category_breakdown': category_breakdown
         }
@@ -460,15 +559,17 @@ class QuizService:
     def get_quiz_statistics(self) -> Dict[str, Any]:
         """Get overall quiz statistics"""
         total_questions = self.question_manager.get_question_count()
-        total_categories = len(self.question_manager.get_question_categories())
         total_tags = len(self.question_manager.get_question_tags())
         
-        # Get section breakdown
-        sections_info = []
-        for section_num in range(1, 6):
-            section_info = self.get_section_info(section_num)
-            if section_info:
-                sections_info.append(section_info)
+        # One grouped count serves the category total and every section
+        counts = self.question_manager.get_counts_by_category()
+        total_categories = len(counts)
+        
+        # Build every section's breakdown in one pass over the shared counts
+        sections_info = [
+            self._build_section_info(section_num, section_data, counts)
+            for section_num, section_data in self.SECTION_CATEGORIES.items()
+        ]
         
         return {
             'total_questions': total_questions,
@@ -479,32 +580,9 @@ class QuizService:
         }
     
     def _parse_question_json_fields(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Parse JSON fields in questions"""
+        """Parse JSON fields in questions not loaded through the question manager"""
         for question in questions:
-            # Parse options
-            if question.get('options'):
-                if isinstance(question['options'], str):
-                    try:
-                        question['options'] = json.loads(question['options'])
-                    except json.JSONDecodeError:
-                        question['options'] = []
-            
-            # Parse tags
-            if question.get('tags'):
-                if isinstance(question['tags'], str):
-                    try:
-                        question['tags'] = json.loads(question['tags'])
-                    except json.JSONDecodeError:
-                        question['tags'] = []
-            
-            # Parse correct_answers
-            if question.get('correct_answers'):
-                if isinstance(question['correct_answers'], str):
-                    try:
-                        question['correct_answers'] = json.loads(question['correct_answers'])
-                    except json.JSONDecodeError:
-                        question['correct_answers'] = [question['correct_answers']]
-        
+            parse_question_json_fields(question)
         return questions
 
 # Global quiz service instance
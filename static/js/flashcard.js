@@ -20,6 +20,10 @@ class FlashcardManager {
         this.totalPages = 1;
         this.perPage = 50;
         
+        // Buffered progress events, flushed to the server in batches
+        this.progressEvents = [];
+        this.progressFlushSize = 10;
+        
         // DOM elements
         this.mainFlashcard = document.getElementById('main-flashcard');
         this.flipBtn = document.getElementById('flip-btn');
@@ -37,6 +41,7 @@ class FlashcardManager {
         this.handleNavigation = this.handleNavigation.bind(this);
         this.handleModeSwitch = this.handleModeSwitch.bind(this);
         this.handleKeyboard = this.handleKeyboard.bind(this);
+        this.flushProgress = this.flushProgress.bind(this);
     }
     
     init() {
@@ -71,6 +76,9 @@ class FlashcardManager {
         // Keyboard shortcuts
         document.addEventListener('keydown', this.handleKeyboard);
         
+        // Send any buffered progress when the user leaves the page
+        window.addEventListener('pagehide', this.flushProgress);
+        
         // Card click to flip
         if (this.mainFlashcard) {
             this.mainFlashcard.addEventListener('click', this.handleFlip);
@@ -120,6 +128,7 @@ class FlashcardManager {
                 this.updateCardContent(data.flashcard);
                 this.updateNavigationButtons();
                 this.resetFlipState();
+                this.recordCardView();
             } else {
                 console.error('Navigation failed:', data.error);
             }
@@ -139,6 +148,7 @@ class FlashcardManager {
                 this.updateCardContent(data.flashcard);
                 this.updateNavigationButtons();
                 this.resetFlipState();
+                this.recordCardView();
             } else {
                 console.error('Set card failed:', data.error);
             }
@@ -147,6 +157,33 @@ class FlashcardManager {
         }
     }
     
+    recordCardView() {
+        this.progressEvents.push({ cards_viewed: 1 });
+        if (this.progressEvents.length >= this.progressFlushSize) {
+            this.flushProgress();
+        }
+    }
+    
+    flushProgress() {
+        if (this.progressEvents.length === 0) return;
+        
+        const payload = JSON.stringify({ events: this.progressEvents });
+        const url = `/api/flashcards/${this.sessionId}/progress`;
+        this.progressEvents = [];
+        
+        // sendBeacon survives page unload; fall back to fetch where unavailable
+        if (navigator.sendBeacon) {
+            navigator.sendBeacon(url, new Blob([payload], { type: 'application/json' }));
+        } else {
+            fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: payload,
+                keepalive: true
+            }).catch(error => console.error('Error saving flashcard progress:', error));
+        }
+    }
+    
     handleFlip() {
         if (this.mainFlashcard) {
             this.mainFlashcard.classList.toggle('flipped');
@@ -361,6 +398,8 @@ class FlashcardManager {
     destroy() {
         // Clean up event listeners
         document.removeEventListener('keydown', this.handleKeyboard);
+        window.removeEventListener('pagehide', this.flushProgress);
+        this.flushProgress();
     }
 }
 
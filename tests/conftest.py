@@ -4,40 +4,21 @@ Pytest configuration and fixtures for Security Plus Training Tool tests
 import pytest
 import sys
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType, SimpleNamespace
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-@pytest.fixture
-def mock_question_manager():
-    """Mock question manager for testing"""
-    mock_manager = Mock()
-    mock_manager.get_questions.return_value = [
-        {
-            'id': '1',
-            'question_text': 'What is a firewall?',
-            'question_type': 'multiple_choice',
-            'category': 'Technologies and Tools',
-            'difficulty': 'beginner',
-            'options': ['A security device', 'A network protocol', 'A type of virus', 'A database'],
-            'correct_answer': '0',
-            'explanation': 'A firewall is a security device that monitors and controls network traffic.',
-            'tags': ['firewall', 'security', 'network']
-        },
-        {
-            'id': '2',
-            'question_text': 'Is encryption important for data security?',
-            'question_type': 'true_false',
-            'category': 'Cryptography and PKI',
-            'difficulty': 'beginner',
-            'correct_answer': 'True',
-            'explanation': 'Encryption is essential for protecting data confidentiality.',
-            'tags': ['encryption', 'security']
-        }
-    ]
-    mock_manager.get_question.return_value = {
+def pytest_configure(config):
+    # Registered here so route modules can pin to a worker whether or not pytest-xdist is installed
+    config.addinivalue_line("markers", "xdist_group(name): keep tests on one pytest-xdist worker")
+
+# Sample question data shared by every fixture; read-only so tests cannot leak edits
+_SAMPLE_QUESTIONS = (
+    MappingProxyType({
         'id': '1',
         'question_text': 'What is a firewall?',
         'question_type': 'multiple_choice',
@@ -47,7 +28,35 @@ def mock_question_manager():
         'correct_answer': '0',
         'explanation': 'A firewall is a security device that monitors and controls network traffic.',
         'tags': ['firewall', 'security', 'network']
-    }
+    }),
+    MappingProxyType({
+        'id': '2',
+        'question_text': 'Is encryption important for data security?',
+        'question_type': 'true_false',
+        'category': 'Cryptography and PKI',
+        'difficulty': 'beginner',
+        'correct_answer': 'True',
+        'explanation': 'Encryption is essential for protecting data confidentiality.',
+        'tags': ['encryption', 'security']
+    }),
+    MappingProxyType({
+        'id': '3',
+        'question_text': 'What does PKI stand for?',
+        'question_type': 'fill_in_blank',
+        'category': 'Cryptography and PKI',
+        'difficulty': 'intermediate',
+        'correct_answers': ['Public Key Infrastructure'],
+        'explanation': 'PKI stands for Public Key Infrastructure.',
+        'tags': ['pki', 'cryptography']
+    })
+)
+
+@pytest.fixture
+def mock_question_manager():
+    """Mock question manager for testing"""
+    mock_manager = Mock()
+    mock_manager.get_questions.return_value = [dict(q) for q in _SAMPLE_QUESTIONS[:2]]
+    mock_manager.get_question.return_value = dict(_SAMPLE_QUESTIONS[0])
     mock_manager.get_question_categories.return_value = [
         'Technologies and Tools',
         'Threats, Attacks, and Vulnerabilities',
@@ -60,42 +69,64 @@ def mock_question_manager():
     mock_manager.get_question_count.return_value = 10
     return mock_manager
 
+class _QuestionManagerProxy:
+    """Stand-in for api.question_routes.question_manager that forwards to a swappable target"""
+    __slots__ = ('target',)
+
+    def __init__(self, target=None):
+        self.target = target
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+    def __bool__(self):
+        # Routes check `if not question_manager`, so a None target reads as unconfigured
+        return bool(self.target)
+
+@pytest.fixture(scope="session")
+def question_manager_proxy():
+    """Install one proxy into the question API module for the whole test session"""
+    import api.question_routes as question_routes
+    original = question_routes.question_manager
+    proxy = _QuestionManagerProxy()
+    question_routes.question_manager = proxy
+    yield proxy
+    question_routes.question_manager = original
+
 @pytest.fixture
+def api_question_manager(question_manager_proxy, mock_question_manager):
+    """Route the question API to mock_question_manager for one test"""
+    question_manager_proxy.target = mock_question_manager
+    yield mock_question_manager
+    question_manager_proxy.target = None
+
+@pytest.fixture
+def fake_question_manager(question_manager_proxy):
+    """
+    Route the question API to a plain stub for tests that only check the response
+
+    Call it with method_name=return_value pairs; a callable value is used as the
+    method itself. Tests that assert on calls should use api_question_manager.
+    """
+    def install(**methods):
+        fake = SimpleNamespace(**{
+            name: value if callable(value) else (lambda *args, _value=value, **kwargs: _value)
+            for name, value in methods.items()
+        })
+        question_manager_proxy.target = fake
+        return fake
+    yield install
+    question_manager_proxy.target = None
+
+@pytest.fixture
+def no_question_manager(question_manager_proxy):
+    """Make the question API behave as if the database is not configured"""
+    question_manager_proxy.target = None
+
+@pytest.fixture(scope="session")
 def sample_questions():
-    """Sample questions for testing"""
-    return [
-        {
-            'id': '1',
-            'question_text': 'What is a firewall?',
-            'question_type': 'multiple_choice',
-            'category': 'Technologies and Tools',
-            'difficulty': 'beginner',
-            'options': ['A security device', 'A network protocol', 'A type of virus', 'A database'],
-            'correct_answer': '0',
-            'explanation': 'A firewall is a security device that monitors and controls network traffic.',
-            'tags': ['firewall', 'security', 'network']
-        },
-        {
-            'id': '2',
-            'question_text': 'Is encryption important for data security?',
-            'question_type': 'true_false',
-            'category': 'Cryptography and PKI',
-            'difficulty': 'beginner',
-            'correct_answer': 'True',
-            'explanation': 'Encryption is essential for protecting data confidentiality.',
-            'tags': ['encryption', 'security']
-        },
-        {
-            'id': '3',
-            'question_text': 'What does PKI stand for?',
-            'question_type': 'fill_in_blank',
-            'category': 'Cryptography and PKI',
-            'difficulty': 'intermediate',
-            'correct_answers': ['Public Key Infrastructure'],
-            'explanation': 'PKI stands for Public Key Infrastructure.',
-            'tags': ['pki', 'cryptography']
-        }
-    ]
+    """Sample questions for testing (read-only and shared by every test)"""
+    return _SAMPLE_QUESTIONS
 
 @pytest.fixture
 def mock_quiz_session():
@@ -135,29 +166,58 @@ def mock_quiz_manager():
     
     return manager
 
-@pytest.fixture
-def app():
-    """Flask app fixture for testing"""
-    import sys
-    import os
-    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    
-    # Import the main app.py file directly
+@lru_cache(maxsize=1)
+def _load_main_app():
+    """Execute app.py once per test session (and only if a test needs the app)"""
     import importlib.util
     spec = importlib.util.spec_from_file_location("main_app", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py"))
     main_app = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(main_app)
+    # Register before executing so patch('main_app.<name>') resolves to this module
+    sys.modules["main_app"] = main_app
+    try:
+        spec.loader.exec_module(main_app)
+    except BaseException:
+        sys.modules.pop("main_app", None)
+        raise
+    return main_app
+
+@pytest.fixture(scope="session")
+def app():
+    """Flask app fixture for testing"""
+    main_app = _load_main_app()
     
     flask_app = main_app.app
     flask_app.config['TESTING'] = True
     flask_app.config['SECRET_KEY'] = 'test-secret-key'
     return flask_app
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def url_rules(app):
+    """Every URL rule registered on the app"""
+    return frozenset(rule.rule for rule in app.url_map.iter_rules())
+
+@pytest.fixture(scope="session")
+def blueprint_names(app):
+    """Names of every blueprint registered on the app"""
+    return frozenset(app.blueprints)
+
+@pytest.fixture(scope="session")
 def client(app):
-    """Flask test client"""
+    """Flask test client, shared by every route test"""
     return app.test_client()
 
+@pytest.fixture(autouse=True)
+def _reset_client_state(request):
+    """Clear per-user state left on the shared client after each route test"""
+    yield
+    if 'client' not in request.fixturenames:
+        return
+    with request.getfixturevalue('client').session_transaction() as flask_session:
+        flask_session.clear()
+    from utils.quiz_logic import quiz_manager
+    for quiz_id in list(quiz_manager.active_sessions):
+        quiz_manager.cleanup_session(quiz_id)
+
 @pytest.fixture
 def runner(app):
     """Flask CLI test runner"""
@@ -2,282 +2,213 @@
 Unit tests for API routes
 """
 import pytest
-import json
-from unittest.mock import Mock, patch
-from api.question_routes import question_api
+from unittest.mock import Mock
+
+# Keep this module on one xdist worker so its session-scoped app and client are built once
+pytestmark = pytest.mark.xdist_group("api_routes")
+
+
+@pytest.fixture
+def mock_progress_service(monkeypatch):
+    """Replace the shared ProgressService with a Mock for one test"""
+    service = Mock()
+    monkeypatch.setattr('services.progress_service.progress_service', service)
+    return service
+
+@pytest.fixture
+def mock_flashcard_service(monkeypatch):
+    """Replace the question API's flashcard_service with a Mock holding one section 2 session"""
+    service = Mock()
+    service.get_session.return_value = Mock(section=2)
+    monkeypatch.setattr('api.question_routes.flashcard_service', service)
+    return service
+
+@pytest.fixture
+def logged_in_client(client):
+    """Shared client with a user in the Flask session"""
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = 'user-123'
+    return client
 
 
 class TestQuestionAPIRoutes:
     """Test cases for question API routes"""
     
-    def test_get_questions_success(self, client, mock_question_manager, sample_questions):
+    def test_get_questions_success(self, client, api_question_manager, sample_questions):
         """Test successful GET /api/questions"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_questions.return_value = sample_questions[:2]
-            
-            response = client.get('/api/questions')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            assert len(data['questions']) == 2
-            assert data['count'] == 2
-            mock_question_manager.get_questions.assert_called_once_with(
-                category=None,
-                difficulty=None,
-                tags=None,
-                limit=10,
-                skip=0
-            )
+        api_question_manager.get_questions.return_value = [dict(q) for q in sample_questions[:2]]
+        
+        response = client.get('/api/questions')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert len(data['questions']) == 2
+        assert data['count'] == 2
+        api_question_manager.get_questions.assert_called_once_with(
+            category=None,
+            difficulty=None,
+            tags=None,
+            limit=10,
+            skip=0
+        )
     
-    def test_get_questions_with_filters(self, client, mock_question_manager, sample_questions):
+    def test_get_questions_with_filters(self, client, api_question_manager, sample_questions):
         """Test GET /api/questions with query parameters"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_questions.return_value = sample_questions[:1]
-            
-            response = client.get('/api/questions?category=Technologies%20and%20Tools&difficulty=beginner&limit=5&skip=2')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            mock_question_manager.get_questions.assert_called_once_with(
-                category='Technologies and Tools',
-                difficulty='beginner',
-                tags=None,
-                limit=5,
-                skip=2
-            )
+        api_question_manager.get_questions.return_value = [dict(q) for q in sample_questions[:1]]
+        
+        response = client.get('/api/questions?category=Technologies%20and%20Tools&difficulty=beginner&limit=5&skip=2')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        api_question_manager.get_questions.assert_called_once_with(
+            category='Technologies and Tools',
+            difficulty='beginner',
+            tags=None,
+            limit=5,
+            skip=2
+        )
     
-    def test_get_questions_with_tags(self, client, mock_question_manager, sample_questions):
+    def test_get_questions_with_tags(self, client, api_question_manager, sample_questions):
         """Test GET /api/questions with multiple tags"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_questions.return_value = sample_questions[:1]
-            
-            response = client.get('/api/questions?tags=firewall&tags=security')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            mock_question_manager.get_questions.assert_called_once_with(
-                category=None,
-                difficulty=None,
-                tags=['firewall', 'security'],
-                limit=10,
-                skip=0
-            )
-    
-    def test_get_questions_no_question_manager(self, client):
-        """Test GET /api/questions when question_manager is None"""
-        with patch('api.question_routes.question_manager', None):
-            response = client.get('/api/questions')
-            
-            assert response.status_code == 503
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert 'Database not configured' in data['error']
-    
-    def test_get_questions_exception(self, client, mock_question_manager):
-        """Test GET /api/questions with exception"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_questions.side_effect = Exception("Database error")
-            
-            response = client.get('/api/questions')
-            
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == "Database error"
+        api_question_manager.get_questions.return_value = [dict(q) for q in sample_questions[:1]]
+        
+        response = client.get('/api/questions?tags=firewall&tags=security')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        api_question_manager.get_questions.assert_called_once_with(
+            category=None,
+            difficulty=None,
+            tags=['firewall', 'security'],
+            limit=10,
+            skip=0
+        )
     
-    def test_get_question_success(self, client, mock_question_manager):
+    def test_get_question_success(self, client, api_question_manager):
         """Test successful GET /api/questions/<question_id>"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question.return_value = {
-                'id': '1',
-                'question_text': 'What is a firewall?',
-                'question_type': 'multiple_choice'
-            }
-            
-            response = client.get('/api/questions/1')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            assert data['question']['id'] == '1'
-            assert data['question']['question_text'] == 'What is a firewall?'
-            mock_question_manager.get_question.assert_called_once_with('1')
+        api_question_manager.get_question.return_value = {
+            'id': '1',
+            'question_text': 'What is a firewall?',
+            'question_type': 'multiple_choice'
+        }
+        
+        response = client.get('/api/questions/1')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert data['question']['id'] == '1'
+        assert data['question']['question_text'] == 'What is a firewall?'
+        api_question_manager.get_question.assert_called_once_with('1')
     
-    def test_get_question_not_found(self, client, mock_question_manager):
+    def test_get_question_not_found(self, client, api_question_manager):
         """Test GET /api/questions/<question_id> when question not found"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question.return_value = None
-            
-            response = client.get('/api/questions/999')
-            
-            assert response.status_code == 404
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == 'Question not found'
-    
-    def test_get_question_no_question_manager(self, client):
-        """Test GET /api/questions/<question_id> when question_manager is None"""
-        with patch('api.question_routes.question_manager', None):
-            response = client.get('/api/questions/1')
-            
-            assert response.status_code == 503
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert 'Database not configured' in data['error']
-    
-    def test_get_question_exception(self, client, mock_question_manager):
-        """Test GET /api/questions/<question_id> with exception"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question.side_effect = Exception("Database error")
-            
-            response = client.get('/api/questions/1')
-            
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == "Database error"
+        api_question_manager.get_question.return_value = None
+        
+        response = client.get('/api/questions/999')
+        
+        assert response.status_code == 404
+        data = response.json
+        assert data['success'] is False
+        assert data['error'] == 'Question not found'
     
-    def test_get_categories_success(self, client, mock_question_manager):
+    def test_get_categories_success(self, client, api_question_manager):
         """Test successful GET /api/categories"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_categories.return_value = [
-                'Technologies and Tools',
-                'Threats, Attacks, and Vulnerabilities',
-                'Identity and Access Management',
-                'Cryptography and PKI'
-            ]
-            
-            response = client.get('/api/categories')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            assert len(data['categories']) == 4
-            assert 'Technologies and Tools' in data['categories']
-            mock_question_manager.get_question_categories.assert_called_once()
-    
-    def test_get_categories_no_question_manager(self, client):
-        """Test GET /api/categories when question_manager is None"""
-        with patch('api.question_routes.question_manager', None):
-            response = client.get('/api/categories')
-            
-            assert response.status_code == 503
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert 'Database not configured' in data['error']
-    
-    def test_get_categories_exception(self, client, mock_question_manager):
-        """Test GET /api/categories with exception"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_categories.side_effect = Exception("Database error")
-            
-            response = client.get('/api/categories')
-            
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == "Database error"
+        api_question_manager.get_question_categories.return_value = [
+            'Technologies and Tools',
+            'Threats, Attacks, and Vulnerabilities',
+            'Identity and Access Management',
+            'Cryptography and PKI'
+        ]
+        
+        response = client.get('/api/categories')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert len(data['categories']) == 4
+        assert 'Technologies and Tools' in data['categories']
+        api_question_manager.get_question_categories.assert_called_once()
     
-    def test_get_tags_success(self, client, mock_question_manager):
+    def test_get_tags_success(self, client, api_question_manager):
         """Test successful GET /api/tags"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_tags.return_value = [
-                'firewall', 'security', 'network', 'encryption', 'authentication'
-            ]
-            
-            response = client.get('/api/tags')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            assert len(data['tags']) == 5
-            assert 'firewall' in data['tags']
-            assert 'security' in data['tags']
-            mock_question_manager.get_question_tags.assert_called_once()
-    
-    def test_get_tags_no_question_manager(self, client):
-        """Test GET /api/tags when question_manager is None"""
-        with patch('api.question_routes.question_manager', None):
-            response = client.get('/api/tags')
-            
-            assert response.status_code == 503
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert 'Database not configured' in data['error']
-    
-    def test_get_tags_exception(self, client, mock_question_manager):
-        """Test GET /api/tags with exception"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_tags.side_effect = Exception("Database error")
-            
-            response = client.get('/api/tags')
-            
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == "Database error"
+        api_question_manager.get_question_tags.return_value = [
+            'firewall', 'security', 'network', 'encryption', 'authentication'
+        ]
+        
+        response = client.get('/api/tags')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert len(data['tags']) == 5
+        assert 'firewall' in data['tags']
+        assert 'security' in data['tags']
+        api_question_manager.get_question_tags.assert_called_once()
     
-    def test_get_stats_success(self, client, mock_question_manager):
+    def test_get_stats_success(self, client, fake_question_manager):
         """Test successful GET /api/stats"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_count.return_value = 10
-            mock_question_manager.get_question_categories.return_value = [
-                'Technologies and Tools',
-                'Threats, Attacks, and Vulnerabilities'
-            ]
-            mock_question_manager.get_question_tags.return_value = [
-                'firewall', 'security', 'network'
-            ]
-            
-            # Mock get_question_count for specific categories
-            def mock_get_count(category=None):
-                if category == 'Technologies and Tools':
-                    return 5
-                elif category == 'Threats, Attacks, and Vulnerabilities':
-                    return 5
-                return 10
-            
-            mock_question_manager.get_question_count.side_effect = mock_get_count
-            
-            response = client.get('/api/stats')
-            
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['success'] is True
-            assert 'stats' in data
-            
-            stats = data['stats']
-            assert stats['total_questions'] == 10
-            assert stats['total_categories'] == 2
-            assert stats['total_tags'] == 3
-            assert 'category_breakdown' in stats
-            assert stats['category_breakdown']['Technologies and Tools'] == 5
-            assert stats['category_breakdown']['Threats, Attacks, and Vulnerabilities'] == 5
+        category_counts = {
+            'Technologies and Tools': 5,
+            'Threats, Attacks, and Vulnerabilities': 5
+        }
+        fake_question_manager(
+            get_question_count=lambda category=None: category_counts.get(category, 10),
+            get_question_categories=list(category_counts),
+            get_question_tags=['firewall', 'security', 'network']
+        )
+        
+        response = client.get('/api/stats')
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert 'stats' in data
+        
+        stats = data['stats']
+        assert stats['total_questions'] == 10
+        assert stats['total_categories'] == 2
+        assert stats['total_tags'] == 3
+        assert 'category_breakdown' in stats
+        assert stats['category_breakdown']['Technologies and Tools'] == 5
+        assert stats['category_breakdown']['Threats, Attacks, and Vulnerabilities'] == 5
     
-    def test_get_stats_no_question_manager(self, client):
-        """Test GET /api/stats when question_manager is None"""
-        with patch('api.question_routes.question_manager', None):
-            response = client.get('/api/stats')
-            
-            assert response.status_code == 503
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert 'Database not configured' in data['error']
+    @pytest.mark.parametrize("url", [
+        '/api/questions',
+        '/api/questions/1',
+        '/api/categories',
+        '/api/tags',
+        '/api/stats'
+    ])
+    def test_no_question_manager(self, client, no_question_manager, url):
+        """Test API routes when question_manager is None"""
+        response = client.get(url)
+        
+        assert response.status_code == 503
+        data = response.json
+        assert data['success'] is False
+        assert 'Database not configured' in data['error']
     
-    def test_get_stats_exception(self, client, mock_question_manager):
-        """Test GET /api/stats with exception"""
-        with patch('api.question_routes.question_manager', mock_question_manager):
-            mock_question_manager.get_question_count.side_effect = Exception("Database error")
-            
-            response = client.get('/api/stats')
-            
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data['success'] is False
-            assert data['error'] == "Database error"
+    @pytest.mark.parametrize("url,method_name", [
+        ('/api/questions', 'get_questions'),
+        ('/api/questions/1', 'get_question'),
+        ('/api/categories', 'get_question_categories'),
+        ('/api/tags', 'get_question_tags'),
+        ('/api/stats', 'get_question_count')
+    ])
+    def test_question_manager_exception(self, client, api_question_manager, url, method_name):
+        """Test API routes when the question manager raises"""
+        getattr(api_question_manager, method_name).side_effect = Exception("Database error")
+        
+        response = client.get(url)
+        
+        assert response.status_code == 500
+        data = response.json
+        assert data['success'] is False
+        assert data['error'] == "Database error"
     
     def test_invalid_route(self, client):
         """Test accessing invalid API route"""
@@ -285,16 +216,126 @@ class TestQuestionAPIRoutes:
         
         assert response.status_code == 404
     
-    def test_api_blueprint_registration(self, app):
+    def test_api_blueprint_registration(self, blueprint_names, url_rules):
         """Test that the API blueprint is properly registered"""
         # Check if the blueprint is registered
-        blueprint_names = [bp.name for bp in app.blueprints.values()]
         assert 'question_api' in blueprint_names
         
         # Check if routes are registered
-        rules = [rule.rule for rule in app.url_map.iter_rules()]
-        assert '/api/questions' in rules
-        assert '/api/questions/<question_id>' in rules
-        assert '/api/categories' in rules
-        assert '/api/tags' in rules
-        assert '/api/stats' in rules
+        assert '/api/questions' in url_rules
+        assert '/api/questions/<question_id>' in url_rules
+        assert '/api/categories' in url_rules
+        assert '/api/tags' in url_rules
+        assert '/api/stats' in url_rules
+
+
+class TestQuizHistoryAPI:
+    """Test cases for the keyset-paginated quiz history endpoint"""
+    
+    _ROWS = [
+        {'id': 9, 'quiz_id': 'q9', 'completed_at': '2025-01-01T10:00:00+00:00'},
+        {'id': 8, 'quiz_id': 'q8', 'completed_at': '2025-01-01T10:00:00+00:00'}  # Same timestamp
+    ]
+    
+    @pytest.mark.parametrize("query,expected_before,rows,expected_cursor", [
+        pytest.param({'limit': 2}, None, _ROWS, '2025-01-01T10:00:00+00:00,8', id="full_page"),
+        pytest.param(
+            {'limit': 2, 'before': '2025-01-01T10:00:00+00:00,8'},
+            ('2025-01-01T10:00:00+00:00', 8), _ROWS[:1], None,
+            id="last_page"
+        ),
+        pytest.param(
+            {'limit': 2, 'before': '2025-01-01T10:00:00Z,8'},
+            ('2025-01-01T10:00:00+00:00', 8), _ROWS[:1], None,
+            id="normalized_timestamp"
+        )
+    ])
+    def test_quiz_history_cursor(self, logged_in_client, mock_progress_service,
+                                 query, expected_before, rows, expected_cursor):
+        """Test the (completed_at, id) cursor is passed through and returned for full pages"""
+        mock_progress_service.get_user_quiz_history.return_value = [dict(row) for row in rows]
+        
+        response = logged_in_client.get('/api/progress/quiz-history', query_string=query)
+        
+        assert response.status_code == 200
+        data = response.json
+        assert data['success'] is True
+        assert [row['id'] for row in data['results']] == [row['id'] for row in rows]
+        assert data['next_cursor'] == expected_cursor
+        assert mock_progress_service.get_user_quiz_history.call_args.kwargs['before'] == expected_before
+    
+    @pytest.mark.parametrize("cursor", [
+        '2025-01-01T10:00:00+00:00', ',8', '2025-01-01T10:00:00+00:00,x',
+        'yesterday,8',
+        '2025-01-01",id.gt.0),8'  # Would break out of the quoted or_() filter value
+    ])
+    def test_quiz_history_invalid_cursor(self, logged_in_client, mock_progress_service, cursor):
+        """Test malformed cursors are rejected without querying"""
+        response = logged_in_client.get('/api/progress/quiz-history', query_string={'before': cursor})
+        
+        assert response.status_code == 400
+        mock_progress_service.get_user_quiz_history.assert_not_called()
+    
+    def test_quiz_history_login_required(self, client, mock_progress_service):
+        """Test the endpoint requires a logged-in user"""
+        response = client.get('/api/progress/quiz-history')
+        
+        assert response.status_code == 401
+        mock_progress_service.get_user_quiz_history.assert_not_called()
+
+
+class TestFlashcardProgressAPI:
+    """Test cases for the batched flashcard progress endpoint"""
+    
+    _URL = '/api/flashcards/fc-session-1/progress'
+    
+    def test_save_flashcard_progress_success(self, logged_in_client, mock_flashcard_service, mock_progress_service):
+        """Test every event is saved in one batch with the session's section"""
+        mock_progress_service.save_flashcard_progress_batch.return_value = {'success': True, 'saved': 2}
+        
+        response = logged_in_client.post(self._URL, json={'events': [{}, {'cards_viewed': 3}]})
+        
+        assert response.status_code == 200
+        assert response.json == {'success': True, 'saved': 2}
+        rows = mock_progress_service.save_flashcard_progress_batch.call_args.args[1]
+        assert rows == [
+            {'section': 2, 'cards_viewed': 1, 'session_id': 'fc-session-1'},
+            {'section': 2, 'cards_viewed': 3, 'session_id': 'fc-session-1'}
+        ]
+    
+    def test_save_flashcard_progress_login_required(self, client, mock_flashcard_service, mock_progress_service):
+        """Test the endpoint requires a logged-in user"""
+        response = client.post(self._URL, json={'events': [{}]})
+        
+        assert response.status_code == 401
+        mock_progress_service.save_flashcard_progress_batch.assert_not_called()
+    
+    @pytest.mark.parametrize("body", [
+        pytest.param('{"events": [', id="malformed_json"),
+        pytest.param('[]', id="not_an_object"),
+        pytest.param('{"events": {"cards_viewed": 1}}', id="events_not_a_list"),
+        pytest.param('{"events": ["card"]}', id="event_not_an_object"),
+        pytest.param('{"events": [{"cards_viewed": 0}]}', id="zero_cards"),
+        pytest.param('{"events": [{"cards_viewed": -4}]}', id="negative_cards"),
+        pytest.param('{"events": [{"cards_viewed": "2"}]}', id="string_cards"),
+        pytest.param('{"events": [{"cards_viewed": 1.5}]}', id="float_cards"),
+        pytest.param('{"events": [{"cards_viewed": true}]}', id="bool_cards")
+    ])
+    def test_save_flashcard_progress_bad_request(self, logged_in_client, mock_flashcard_service,
+                                                 mock_progress_service, body):
+        """Test malformed bodies and invalid cards_viewed values are rejected without saving"""
+        response = logged_in_client.post(self._URL, data=body, content_type='application/json')
+        
+        assert response.status_code == 400
+        assert response.json['success'] is False
+        mock_progress_service.save_flashcard_progress_batch.assert_not_called()
+    
+    def test_save_flashcard_progress_batch_too_large(self, logged_in_client, mock_flashcard_service,
+                                                     mock_progress_service):
+        """Test batches over the event cap are rejected without saving"""
+        from api.question_routes import MAX_FLASHCARD_PROGRESS_EVENTS
+        
+        response = logged_in_client.post(self._URL, json={'events': [{}] * (MAX_FLASHCARD_PROGRESS_EVENTS + 1)})
+        
+        assert response.status_code == 400
+        mock_progress_service.save_flashcard_progress_batch.assert_not_called()
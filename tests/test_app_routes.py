@@ -2,10 +2,84 @@
 Unit tests for Flask app routes
 """
 import pytest
-import json
-from unittest.mock import Mock, patch
-from flask import session, url_for
+from unittest.mock import Mock
+from types import MappingProxyType
 
+# Keep this module on one xdist worker so its session-scoped app and client are built once
+pytestmark = pytest.mark.xdist_group("app_routes")
+
+# Service return values shared by the route tests; tests assign copies
+_MULTIPLE_CHOICE_QUESTION = MappingProxyType({
+    'id': '1',
+    'question_text': 'What is a firewall?',
+    'question_type': 'multiple_choice',
+    'options': ['A security device', 'A network protocol'],
+    'correct_answer': '0',
+    'explanation': 'A firewall is a security device.',
+    'question_number': 1,
+    'total_questions': 10,
+    'progress_percentage': 10.0
+})
+
+_TRUE_FALSE_QUESTION = MappingProxyType({
+    'id': '2',
+    'question_text': 'Is encryption important?',
+    'question_type': 'true_false',
+    'correct_answer': 'True',
+    'explanation': 'Yes, encryption is important.',
+    'question_number': 1,
+    'total_questions': 10,
+    'progress_percentage': 10.0
+})
+
+_ANSWER_RESULT = MappingProxyType({
+    'is_correct': True,
+    'explanation': 'Correct answer',
+    'question_number': 1,
+    'total_questions': 10,
+    'has_next_question': True,
+    'quiz_completed': False
+})
+
+_QUIZ_RESULTS = MappingProxyType({
+    'quiz_id': 'test_quiz_123',
+    'score': 8,
+    'total_questions': 10,
+    'percentage': 80.0,
+    'wrong_questions': 2
+})
+
+
+@pytest.fixture(scope="module")
+def _installed_quiz_service(app):
+    """Swap main_app.quiz_service for one Mock for the whole module"""
+    import main_app
+    real_quiz_service = main_app.quiz_service
+    stub = Mock()
+    main_app.quiz_service = stub
+    yield stub
+    main_app.quiz_service = real_quiz_service
+
+@pytest.fixture
+def mock_quiz_service(_installed_quiz_service):
+    """The module's quiz_service stub, with return values and calls cleared after each test"""
+    yield _installed_quiz_service
+    _installed_quiz_service.reset_mock(return_value=True, side_effect=True)
+
+@pytest.fixture(scope="module")
+def registered_user(client):
+    """Register one account for the module and return its login credentials"""
+    client.post('/register', data={
+        'first_name': 'John',
+        'last_name': 'Doe',
+        'email': 'john@example.com',
+        'password': 'password123',
+        'confirm_password': 'password123',
+        'experience_level': 'beginner',
+        'interests': 'security',
+        'terms': 'on'
+    })
+    return {'email': 'john@example.com', 'password': 'password123'}
 
 class TestAppRoutes:
     """Test cases for Flask app routes"""
@@ -16,59 +90,28 @@ class TestAppRoutes:
         
         assert response.status_code == 200
         # Check if the template is rendered (basic check)
-        assert b'<!DOCTYPE html>' in response.data or b'<html' in response.data
-    
-    def test_about_route(self, client):
-        """Test about page route"""
-        response = client.get('/about')
-        
-        assert response.status_code == 200
-    
-    def test_contact_route(self, client):
-        """Test contact page route"""
-        response = client.get('/contact')
+        assert response.data.lstrip()[:9].lower().startswith((b'<!doctype', b'<html'))
+    
+    @pytest.mark.parametrize("path", [
+        '/about',
+        '/contact',
+        '/training',
+        '/flashcards',
+        '/quizzes',
+        '/practice-test',
+        '/login',
+        '/register'
+    ])
+    def test_page_route(self, client, path):
+        """Test read-only page routes render"""
+        response = client.get(path)
         
         assert response.status_code == 200
     
-    def test_training_route(self, client):
-        """Test training page route"""
-        response = client.get('/training')
-        
-        assert response.status_code == 200
-    
-    def test_flashcards_route(self, client):
-        """Test flashcards page route"""
-        response = client.get('/flashcards')
-        
-        assert response.status_code == 200
-    
-    def test_quizzes_route(self, client):
-        """Test quizzes page route"""
-        response = client.get('/quizzes')
-        
-        assert response.status_code == 200
-    
-    def test_practice_test_route(self, client):
-        """Test practice test page route"""
-        response = client.get('/practice-test')
-        
-        assert response.status_code == 200
-    
-    @patch('main_app.quiz_service')
-    def test_quiz_chapter_success(self, mock_quiz_service, client, sample_questions):
+    def test_quiz_chapter_success(self, mock_quiz_service, client):
         """Test successful chapter quiz creation"""
         mock_quiz_service.create_chapter_quiz.return_value = 'test_quiz_123'
-        mock_quiz_service.get_quiz_question.return_value = {
-            'id': '1',
-            'question_text': 'What is a firewall?',
-            'question_type': 'multiple_choice',
-            'options': ['A security device', 'A network protocol'],
-            'correct_answer': '0',
-            'explanation': 'A firewall is a security device.',
-            'question_number': 1,
-            'total_questions': 10,
-            'progress_percentage': 10.0
-        }
+        mock_quiz_service.get_quiz_question.return_value = dict(_MULTIPLE_CHOICE_QUESTION)
         
         response = client.get('/quiz/chapter/1')
         
@@ -76,7 +119,6 @@ class TestAppRoutes:
         mock_quiz_service.create_chapter_quiz.assert_called_once_with(chapter=1, limit=10)
         mock_quiz_service.get_quiz_question.assert_called_once_with('test_quiz_123', 1)
     
-    @patch('main_app.quiz_service')
     def test_quiz_chapter_no_questions(self, mock_quiz_service, client):
         """Test chapter quiz when no questions found"""
         mock_quiz_service.create_chapter_quiz.return_value = None
@@ -85,9 +127,8 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect
         # Should redirect to quizzes page
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    @patch('main_app.quiz_service')
     def test_quiz_chapter_error_loading_questions(self, mock_quiz_service, client):
         """Test chapter quiz when error loading questions"""
         mock_quiz_service.create_chapter_quiz.return_value = 'test_quiz_123'
@@ -97,22 +138,12 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect
         # Should redirect to quizzes page
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    @patch('main_app.quiz_service')
     def test_quiz_random_success(self, mock_quiz_service, client):
         """Test successful random quiz creation"""
         mock_quiz_service.create_random_quiz.return_value = 'test_quiz_456'
-        mock_quiz_service.get_quiz_question.return_value = {
-            'id': '2',
-            'question_text': 'Is encryption important?',
-            'question_type': 'true_false',
-            'correct_answer': 'True',
-            'explanation': 'Yes, encryption is important.',
-            'question_number': 1,
-            'total_questions': 10,
-            'progress_percentage': 10.0
-        }
+        mock_quiz_service.get_quiz_question.return_value = dict(_TRUE_FALSE_QUESTION)
         
         response = client.get('/quiz/random')
         
@@ -120,7 +151,6 @@ class TestAppRoutes:
         mock_quiz_service.create_random_quiz.assert_called_once_with(limit=10)
         mock_quiz_service.get_quiz_question.assert_called_once_with('test_quiz_456', 1)
     
-    @patch('main_app.quiz_service')
     def test_quiz_random_no_questions(self, mock_quiz_service, client):
         """Test random quiz when no questions found"""
         mock_quiz_service.create_random_quiz.return_value = None
@@ -129,20 +159,13 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect
         # Should redirect to quizzes page
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    @patch('main_app.quiz_service')
     def test_quiz_question_success(self, mock_quiz_service, client):
         """Test successful quiz question retrieval"""
         mock_quiz_service.get_quiz_question.return_value = {
-            'id': '1',
-            'question_text': 'What is a firewall?',
-            'question_type': 'multiple_choice',
-            'options': ['A security device', 'A network protocol'],
-            'correct_answer': '0',
-            'explanation': 'A firewall is a security device.',
+            **_MULTIPLE_CHOICE_QUESTION,
             'question_number': 2,
-            'total_questions': 10,
             'progress_percentage': 20.0
         }
         
@@ -151,7 +174,6 @@ class TestAppRoutes:
         assert response.status_code == 200
         mock_quiz_service.get_quiz_question.assert_called_once_with('test_quiz_123', 2)
     
-    @patch('main_app.quiz_service')
     def test_quiz_question_not_found(self, mock_quiz_service, client):
         """Test quiz question when question not found"""
         mock_quiz_service.get_quiz_question.return_value = None
@@ -160,33 +182,22 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect
         # Should redirect to quizzes page
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    @patch('main_app.quiz_service')
     def test_submit_quiz_answer_success(self, mock_quiz_service, client):
         """Test successful quiz answer submission"""
-        mock_quiz_service.submit_quiz_answer.return_value = {
-            'is_correct': True,
-            'explanation': 'Correct answer',
-            'question_number': 1,
-            'total_questions': 10,
-            'has_next_question': True,
-            'quiz_completed': False
-        }
+        mock_quiz_service.submit_quiz_answer.return_value = dict(_ANSWER_RESULT)
         
         response = client.post('/quiz/test_quiz_123/submit', data={'answer': '0'})
         
         assert response.status_code == 302  # Redirect to next question
         mock_quiz_service.submit_quiz_answer.assert_called_once_with('test_quiz_123', '0')
     
-    @patch('main_app.quiz_service')
     def test_submit_quiz_answer_quiz_completed(self, mock_quiz_service, client):
         """Test quiz answer submission when quiz is completed"""
         mock_quiz_service.submit_quiz_answer.return_value = {
-            'is_correct': True,
-            'explanation': 'Correct answer',
+            **_ANSWER_RESULT,
             'question_number': 10,
-            'total_questions': 10,
             'has_next_question': False,
             'quiz_completed': True
         }
@@ -195,7 +206,7 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect to results
         # Should redirect to quiz results
-        assert '/quiz/test_quiz_123/results' in response.location
+        assert response.location.endswith('/quiz/test_quiz_123/results')
     
     def test_submit_quiz_answer_no_answer(self, client):
         """Test quiz answer submission with no answer"""
@@ -203,7 +214,6 @@ class TestAppRoutes:
         
         assert response.status_code == 302  # Redirect back
     
-    @patch('main_app.quiz_service')
     def test_submit_quiz_answer_error(self, mock_quiz_service, client):
         """Test quiz answer submission with error"""
         mock_quiz_service.submit_quiz_answer.return_value = None
@@ -211,18 +221,11 @@ class TestAppRoutes:
         response = client.post('/quiz/test_quiz_123/submit', data={'answer': '0'})
         
         assert response.status_code == 302  # Redirect to quizzes
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    @patch('main_app.quiz_service')
     def test_quiz_results_success(self, mock_quiz_service, client):
         """Test successful quiz results display"""
-        mock_quiz_service.get_quiz_results.return_value = {
-            'quiz_id': 'test_quiz_123',
-            'score': 8,
-            'total_questions': 10,
-            'percentage': 80.0,
-            'wrong_questions': 2
-        }
+        mock_quiz_service.get_quiz_results.return_value = dict(_QUIZ_RESULTS)
         mock_quiz_service.get_wrong_questions_review.return_value = [
             {'id': '1', 'question_text': 'Question 1', 'user_answer': 'A', 'correct_answer': 'B'},
             {'id': '2', 'question_text': 'Question 2', 'user_answer': 'C', 'correct_answer': 'D'}
@@ -234,7 +237,6 @@ class TestAppRoutes:
         mock_quiz_service.get_quiz_results.assert_called_once_with('test_quiz_123')
         mock_quiz_service.get_wrong_questions_review.assert_called_once_with('test_quiz_123')
     
-    @patch('main_app.quiz_service')
     def test_quiz_results_not_found(self, mock_quiz_service, client):
         """Test quiz results when results not found"""
         mock_quiz_service.get_quiz_results.return_value = None
@@ -242,36 +244,14 @@ class TestAppRoutes:
         response = client.get('/quiz/test_quiz_123/results')
         
         assert response.status_code == 302  # Redirect to quizzes
-        assert '/quizzes' in response.location
+        assert response.location.endswith('/quizzes')
     
-    def test_login_get(self, client):
-        """Test login page GET request"""
-        response = client.get('/login')
-        
-        assert response.status_code == 200
-    
-    def test_login_post_success(self, client):
+    def test_login_post_success(self, client, registered_user):
         """Test successful login POST request"""
-        # First register a user
-        client.post('/register', data={
-            'first_name': 'John',
-            'last_name': 'Doe',
-            'email': 'john@example.com',
-            'password': 'password123',
-            'confirm_password': 'password123',
-            'experience_level': 'beginner',
-            'interests': 'security',
-            'terms': 'on'
-        })
-        
-        # Then login
-        response = client.post('/login', data={
-            'email': 'john@example.com',
-            'password': 'password123'
-        })
+        response = client.post('/login', data=registered_user)
         
         assert response.status_code == 302  # Redirect to home
-        assert '/' in response.location
+        assert response.location.endswith('/')
     
     def test_login_post_invalid_credentials(self, client):
         """Test login POST with invalid credentials"""
@@ -283,12 +263,6 @@ class TestAppRoutes:
         assert response.status_code == 200  # Stay on login page
         # Should show error message
     
-    def test_register_get(self, client):
-        """Test register page GET request"""
-        response = client.get('/register')
-        
-        assert response.status_code == 200
-    
     def test_register_post_success(self, client):
         """Test successful registration POST request"""
         response = client.post('/register', data={
@@ -303,7 +277,7 @@ class TestAppRoutes:
         })
         
         assert response.status_code == 302  # Redirect to login
-        assert '/login' in response.location
+        assert response.location.endswith('/login')
     
     def test_register_post_missing_fields(self, client):
         """Test registration POST with missing required fields"""
@@ -335,20 +309,8 @@ class TestAppRoutes:
         assert response.status_code == 200  # Stay on register page
         # Should show error message
     
-    def test_register_post_duplicate_email(self, client):
+    def test_register_post_duplicate_email(self, client, registered_user):
         """Test registration POST with duplicate email"""
-        # First registration
-        client.post('/register', data={
-            'first_name': 'John',
-            'last_name': 'Doe',
-            'email': 'john@example.com',
-            'password': 'password123',
-            'confirm_password': 'password123',
-            'experience_level': 'beginner',
-            'interests': 'security',
-            'terms': 'on'
-        })
-        
         # Second registration with same email
         response = client.post('/register', data={
             'first_name': 'Jane',
@@ -362,32 +324,21 @@ class TestAppRoutes:
         })
         
         assert response.status_code == 302  # Redirect to login
-        assert '/login' in response.location
+        assert response.location.endswith('/login')
     
     def test_logout(self, client):
         """Test logout route"""
-        # First login to set session
-        client.post('/register', data={
-            'first_name': 'John',
-            'last_name': 'Doe',
-            'email': 'john@example.com',
-            'password': 'password123',
-            'confirm_password': 'password123',
-            'experience_level': 'beginner',
-            'interests': 'security',
-            'terms': 'on'
-        })
-        
-        client.post('/login', data={
-            'email': 'john@example.com',
-            'password': 'password123'
-        })
+        # Seed a logged-in session directly instead of going through Supabase auth
+        with client.session_transaction() as flask_session:
+            flask_session['user_id'] = 'test-user-id'
+            flask_session['user_email'] = 'john@example.com'
+            flask_session['logged_in'] = True
         
         # Then logout
         response = client.get('/logout')
         
         assert response.status_code == 302  # Redirect to home
-        assert '/' in response.location
+        assert response.location.endswith('/')
     
     def test_invalid_route(self, client):
         """Test accessing invalid route"""
@@ -395,30 +346,28 @@ class TestAppRoutes:
         
         assert response.status_code == 404
     
-    def test_app_configuration(self, app):
+    def test_app_configuration(self, app, blueprint_names):
         """Test Flask app configuration"""
         assert app.config['SECRET_KEY'] == 'test-secret-key'
-        assert 'question_api' in [bp.name for bp in app.blueprints.values()]
+        assert 'question_api' in blueprint_names
     
-    def test_route_registration(self, app):
+    def test_route_registration(self, url_rules):
         """Test that all routes are properly registered"""
-        rules = [rule.rule for rule in app.url_map.iter_rules()]
-        
         # Check main routes
-        assert '/' in rules
-        assert '/about' in rules
-        assert '/contact' in rules
-        assert '/training' in rules
-        assert '/flashcards' in rules
-        assert '/quizzes' in rules
-        assert '/practice-test' in rules
-        assert '/login' in rules
-        assert '/register' in rules
-        assert '/logout' in rules
+        assert '/' in url_rules
+        assert '/about' in url_rules
+        assert '/contact' in url_rules
+        assert '/training' in url_rules
+        assert '/flashcards' in url_rules
+        assert '/quizzes' in url_rules
+        assert '/practice-test' in url_rules
+        assert '/login' in url_rules
+        assert '/register' in url_rules
+        assert '/logout' in url_rules
         
         # Check quiz routes
-        assert '/quiz/chapter/<int:chapter>' in rules
-        assert '/quiz/random' in rules
-        assert '/quiz/<quiz_id>/question/<int:question_number>' in rules
-        assert '/quiz/<quiz_id>/submit' in rules
-        assert '/quiz/<quiz_id>/results' in rules
+        assert '/quiz/chapter/<int:chapter>' in url_rules
+        assert '/quiz/random' in url_rules
+        assert '/quiz/<quiz_id>/question/<int:question_number>' in url_rules
+        assert '/quiz/<quiz_id>/submit' in url_rules
+        assert '/quiz/<quiz_id>/results' in url_rules
@@ -0,0 +1,116 @@
+"""
+Unit tests for ProgressService class
+"""
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services.progress_service import ProgressService
+
+
+@pytest.fixture
+def tables():
+    """One MagicMock per Supabase table, created on first use"""
+    return {}
+
+@pytest.fixture
+def supabase_client(monkeypatch, tables):
+    """Supabase client stand-in whose table() returns the per-table mocks"""
+    client = MagicMock()
+    client.table.side_effect = lambda name: tables.setdefault(name, MagicMock())
+    monkeypatch.setattr('services.progress_service._get_shared_client', lambda: client)
+    return client
+
+@pytest.fixture
+def service(supabase_client):
+    """ProgressService backed by the mock client"""
+    return ProgressService()
+
+def _returns(query, rows):
+    """Make query.execute() return rows as a PostgREST response"""
+    query.execute.return_value = SimpleNamespace(data=rows)
+
+
+class TestUserStatistics:
+    """Test cases for get_user_statistics"""
+
+    def test_statistics_from_rpc(self, service, supabase_client, tables):
+        """Test quiz totals and the average come from one user_quiz_statistics call"""
+        _returns(supabase_client.rpc.return_value, [
+            {'total_quizzes': 4, 'total_practice_tests': 1, 'average_score': '82.5'}
+        ])
+
+        result = service.get_user_statistics('user-123')
+
+        supabase_client.rpc.assert_called_once_with('user_quiz_statistics', {'p_user_id': 'user-123'})
+        assert 'user_quiz_results' not in tables
+        assert result['total_quizzes'] == 4
+        assert result['total_practice_tests'] == 1
+        assert result['average_score'] == 82.5
+
+    def test_statistics_fallback_single_query(self, service, supabase_client, tables):
+        """Test a missing RPC falls back to one select over quiz_type and percentage"""
+        supabase_client.rpc.side_effect = Exception('function user_quiz_statistics does not exist')
+        quiz_results = tables['user_quiz_results'] = MagicMock()
+        _returns(quiz_results.select.return_value.eq.return_value, [
+            {'quiz_type': 'section_quiz', 'percentage': 80},
+            {'quiz_type': 'random_quiz', 'percentage': 60},
+            {'quiz_type': 'practice_test', 'percentage': 70}
+        ])
+
+        result = service.get_user_statistics('user-123')
+
+        quiz_results.select.assert_called_once_with('quiz_type, percentage')
+        assert result['total_quizzes'] == 2
+        assert result['total_practice_tests'] == 1
+        assert result['average_score'] == 70.0
+
+
+class TestQuizHistory:
+    """Test cases for get_user_quiz_history"""
+
+    def test_quiz_history_keyset_filter(self, service, tables):
+        """Test the (completed_at, id) cursor becomes a row-value comparison in the or_() filter"""
+        quiz_results = tables['user_quiz_results'] = MagicMock()
+        query = quiz_results.select.return_value.eq.return_value
+        _returns(query.or_.return_value.order.return_value.order.return_value.limit.return_value, [{'id': 7}])
+
+        result = service.get_user_quiz_history('user-123', limit=5, before=('2025-01-01T10:00:00Z', 8))
+
+        assert result == [{'id': 7}]
+        query.or_.assert_called_once_with(
+            'completed_at.lt."2025-01-01T10:00:00+00:00",'
+            'and(completed_at.eq."2025-01-01T10:00:00+00:00",id.lt.8)'
+        )
+        query.or_.return_value.order.assert_called_once_with('completed_at', desc=True)
+        query.or_.return_value.order.return_value.order.assert_called_once_with('id', desc=True)
+
+    def test_quiz_history_rejects_malformed_cursor(self, service, tables):
+        """Test a cursor timestamp that is not ISO 8601 never reaches the filter"""
+        quiz_results = tables['user_quiz_results'] = MagicMock()
+
+        result = service.get_user_quiz_history('user-123', before=('2025-01-01",id.gt.0)', 8))
+
+        assert result == []
+        quiz_results.select.return_value.eq.return_value.or_.assert_not_called()
+
+class TestBackgroundSaves:
+    """Test cases for the retrying background saves"""
+
+    @pytest.mark.parametrize("error,attempts", [
+        pytest.param(httpx.ReadTimeout('timed out'), 3, id="network_error"),
+        pytest.param(Exception('new row violates row-level security policy'), 1, id="rls_error"),
+        pytest.param(Exception('no unique or exclusion constraint matching the ON CONFLICT'), 1,
+                     id="missing_unique_index")
+    ])
+    def test_quiz_result_retries_only_network_errors(self, service, tables, error, attempts):
+        """Test a quiz result save is retried for network errors but not for errors the server returned"""
+        service.BACKGROUND_BACKOFF_SECONDS = 0
+        quiz_results = tables['user_quiz_results'] = MagicMock()
+        quiz_results.upsert.return_value.execute.side_effect = error
+
+        result = service._submit_background('quiz result save', service.save_quiz_result,
+                                            'user-123', {'quiz_id': 'quiz-1'}).result()
+
+        assert result['success'] is False
+        assert quiz_results.upsert.call_count == attempts
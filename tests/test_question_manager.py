@@ -0,0 +1,207 @@
+"""
+Unit tests for QuestionManager class
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from postgrest.exceptions import APIError
+from database.question_manager import QuestionManager
+
+
+@pytest.fixture
+def db_manager():
+    """DatabaseManager stand-in; get_table() and get_client() return MagicMocks"""
+    return MagicMock()
+
+@pytest.fixture
+def questions_table(db_manager):
+    """The questions table mock the manager queries"""
+    return db_manager.get_table.return_value
+
+@pytest.fixture
+def rpc(db_manager):
+    """The Supabase client's rpc() mock"""
+    return db_manager.get_client.return_value.rpc
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic() for the question manager module"""
+    now = [1000.0]
+    monkeypatch.setattr('database.question_manager.time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+@pytest.fixture
+def manager(db_manager, clock):
+    """QuestionManager over the mock database"""
+    return QuestionManager(db_manager)
+
+def _missing_function(name):
+    """The error PostgREST raises for an RPC whose SQL function was never created"""
+    return APIError({'code': 'PGRST202', 'message': f'Could not find the function public.{name}'})
+
+def _returns(query, rows):
+    """Make query.execute() return rows as a PostgREST response"""
+    query.execute.return_value = SimpleNamespace(data=rows)
+
+
+class TestGetQuestion:
+    """Test cases for the memoized get_question"""
+
+    @pytest.fixture(autouse=True)
+    def _question_row(self, questions_table):
+        """Serve one question row with JSON-encoded options"""
+        _returns(questions_table.select.return_value.eq.return_value,
+                 [{'id': 1, 'question_text': 'What is a firewall?', 'options': '["A", "B"]'}])
+
+    def test_get_question_cached(self, manager, questions_table):
+        """Test a question is fetched and parsed once, and callers get copies"""
+        first = manager.get_question('1')
+        first['question_text'] = 'Edited by the caller'
+
+        second = manager.get_question(1)
+
+        assert second['options'] == ['A', 'B']
+        assert second['question_text'] == 'What is a firewall?'
+        assert questions_table.select.call_count == 1
+
+    @pytest.mark.parametrize("write", [
+        pytest.param(lambda manager: manager.update_question('1', {'difficulty': 'advanced'}), id="update"),
+        pytest.param(lambda manager: manager.delete_question('1'), id="delete")
+    ])
+    def test_get_question_refetched_after_write(self, manager, questions_table, write):
+        """Test a write through the manager bumps the version and invalidates cached rows"""
+        manager.get_question('1')
+        version = manager.version
+
+        write(manager)
+        manager.get_question('1')
+
+        assert manager.version == version + 1
+        assert questions_table.select.call_count == 2
+
+    def test_get_question_expires(self, manager, questions_table, clock):
+        """Test a cached row is re-read after the TTL so edits made elsewhere are seen"""
+        manager.get_question('1')
+        clock[0] += QuestionManager.QUESTION_CACHE_TTL_SECONDS
+
+        manager.get_question('1')
+
+        assert questions_table.select.call_count == 2
+
+    def test_get_question_missing_not_cached(self, manager, questions_table):
+        """Test an unknown id returns None and is looked up again next time"""
+        _returns(questions_table.select.return_value.eq.return_value, [])
+
+        assert manager.get_question('404') is None
+        assert manager.get_question('404') is None
+        assert questions_table.select.call_count == 2
+
+
+class TestCountsByCategory:
+    """Test cases for the cached per-category counts"""
+
+    def test_counts_from_rpc_cached(self, manager, rpc):
+        """Test counts come from one question_counts_by_category call and are then served from cache"""
+        _returns(rpc.return_value, [{'category': 'Cryptography and PKI', 'question_count': 12}])
+
+        assert manager.get_counts_by_category('beginner') == {'Cryptography and PKI': 12}
+        assert manager.get_counts_by_category('beginner') == {'Cryptography and PKI': 12}
+
+        rpc.assert_called_once_with('question_counts_by_category', {'p_difficulty': 'beginner'})
+
+    def test_counts_refetched_after_write_and_ttl(self, manager, rpc, clock):
+        """Test cached counts are dropped by a version bump and by the TTL"""
+        _returns(rpc.return_value, [{'category': 'Cryptography and PKI', 'question_count': 12}])
+        manager.get_counts_by_category()
+
+        manager.delete_question('1')
+        manager.get_counts_by_category()
+        clock[0] += QuestionManager.COUNTS_CACHE_TTL_SECONDS + 1
+        manager.get_counts_by_category()
+
+        assert rpc.call_count == 3
+
+    def test_counts_fallback_pages_category_column(self, manager, rpc, questions_table):
+        """Test a missing RPC falls back to counting the category column page by page"""
+        rpc.side_effect = _missing_function('question_counts_by_category')
+        page = questions_table.select.return_value.order.return_value.range
+        page.return_value.execute.side_effect = [
+            SimpleNamespace(data=[{'category': 'Cryptography and PKI'}] * 1000),
+            SimpleNamespace(data=[{'category': 'Cryptography and PKI'}, {'category': 'Risk Management'}])
+        ]
+
+        assert manager.get_counts_by_category() == {'Cryptography and PKI': 1001, 'Risk Management': 1}
+        questions_table.select.assert_called_with('category')
+        assert [call.args for call in page.call_args_list] == [(0, 999), (1000, 1999)]
+
+
+class TestRandomQuestions:
+    """Test cases for get_random_questions"""
+
+    def test_random_questions_from_rpc(self, manager, rpc):
+        """Test the database picks the rows and they come back parsed"""
+        _returns(rpc.return_value, [{'id': 1, 'tags': '["pki"]'}])
+
+        result = manager.get_random_questions(5, difficulty='beginner', categories=['Cryptography and PKI'])
+
+        assert result == [{'id': 1, 'tags': ['pki']}]
+        rpc.assert_called_once_with('get_random_questions', {
+            'p_limit': 5, 'p_difficulty': 'beginner', 'p_categories': ['Cryptography and PKI']
+        })
+
+    def test_random_questions_fallback_samples_over_fetch(self, manager, rpc, questions_table):
+        """Test a missing RPC falls back to sampling a 3x over-fetch"""
+        rpc.side_effect = _missing_function('get_random_questions')
+        page = questions_table.select.return_value.in_.return_value.range
+        _returns(page.return_value.order.return_value, [{'id': i} for i in range(6)])
+
+        result = manager.get_random_questions(2, categories=['Cryptography and PKI'])
+
+        assert len(result) == 2
+        assert {row['id'] for row in result} <= set(range(6))
+        page.assert_called_once_with(0, 5)
+
+
+class TestMissingRPC:
+    """Test cases for remembering SQL functions that have not been deployed"""
+
+    @pytest.fixture
+    def fallback_rows(self, questions_table):
+        """Serve the same rows to both client-side fallbacks"""
+        rows = [{'id': 1, 'category': 'Cryptography and PKI'}]
+        _returns(questions_table.select.return_value.range.return_value.order.return_value, rows)
+        _returns(questions_table.select.return_value.order.return_value.range.return_value, rows)
+        return rows
+
+    def test_missing_rpc_skipped_until_ttl(self, manager, rpc, clock, fallback_rows):
+        """Test a missing function is tried once, then skipped until the retry interval passes"""
+        rpc.side_effect = _missing_function('get_random_questions')
+
+        manager.get_random_questions(1)
+        manager.get_random_questions(1)
+        assert rpc.call_count == 1
+
+        clock[0] += QuestionManager.MISSING_RPC_RETRY_SECONDS
+        manager.get_random_questions(1)
+        assert rpc.call_count == 2
+
+    def test_missing_rpc_retried_after_write(self, manager, rpc, fallback_rows):
+        """Test a write through the manager forgets the missing function"""
+        rpc.side_effect = _missing_function('question_counts_by_category')
+        manager.get_counts_by_category()
+        manager.invalidate_counts_cache()
+        manager.get_counts_by_category()
+        assert rpc.call_count == 1
+
+        manager.delete_question('1')
+        manager.get_counts_by_category()
+        assert rpc.call_count == 2
+
+    def test_other_rpc_errors_not_remembered(self, manager, rpc, fallback_rows):
+        """Test a failure other than a missing function falls back for that call only"""
+        rpc.side_effect = APIError({'code': '57014', 'message': 'canceling statement due to statement timeout'})
+
+        manager.get_random_questions(1)
+        manager.get_random_questions(1)
+
+        assert rpc.call_count == 2
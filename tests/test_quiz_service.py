@@ -2,11 +2,45 @@
 Unit tests for QuizService class
 """
 import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock
 from services.quiz_service import QuizService
+from utils.quiz_logic import QuizSession
 
 
+@pytest.fixture
+def patched_quiz_manager(monkeypatch):
+    """Replace the quiz service module's quiz_manager with a MagicMock for one test"""
+    manager = MagicMock()
+    monkeypatch.setattr('services.quiz_service.quiz_manager', manager)
+    return manager
+
+@pytest.fixture
+def patched_question_manager(monkeypatch):
+    """Replace the quiz service module's question_manager with a MagicMock for one test"""
+    manager = MagicMock()
+    monkeypatch.setattr('services.quiz_service.question_manager', manager)
+    return manager
+
+@pytest.fixture
+def mock_session():
+    """QuizSession stand-in positioned on the first of three questions"""
+    session = Mock(spec=QuizSession)
+    session.current_question_index = 0
+    session.total_questions = 3
+    return session
+
+@pytest.fixture(scope="module")
+def service():
+    """
+    QuizService shared by tests that don't patch question_manager
+
+    The service binds question_manager when constructed, so tests that patch
+    it build their own instance after the patch is applied.
+    """
+    return QuizService()
+
 class TestQuizService:
     """Test cases for QuizService class"""
     
@@ -15,105 +49,176 @@ class TestQuizService:
         service = QuizService()
         assert service.question_manager is not None
     
-    @patch('services.quiz_service.question_manager')
-    @patch('services.quiz_service.quiz_manager')
-    def test_create_chapter_quiz_success(self, mock_quiz_manager, mock_question_manager, sample_questions):
-        """Test successful chapter quiz creation"""
+    @pytest.mark.parametrize("questions,expected", [
+        # An int is the number of sample questions the database returns
+        pytest.param(2, 'test_quiz_123', id="success"),
+        pytest.param(0, None, id="no_questions"),
+        pytest.param(Exception("Database error"), None, id="exception")
+    ])
+    def test_create_chapter_quiz(self, patched_quiz_manager, patched_question_manager, sample_questions,
+                                 mock_session, questions, expected):
+        """Test chapter quiz creation with questions, without questions, and on a database error"""
         # Setup mocks
-        mock_question_manager.get_questions.return_value = sample_questions[:2]
-        mock_quiz_manager.create_quiz_session.return_value = 'test_quiz_123'
-        mock_session = Mock()
-        mock_quiz_manager.get_session.return_value = mock_session
+        if isinstance(questions, Exception):
+            patched_question_manager.get_questions.side_effect = questions
+        else:
+            patched_question_manager.get_questions.return_value = sample_questions[:questions]
+        patched_quiz_manager.create_quiz_session.return_value = 'test_quiz_123'
+        patched_quiz_manager.get_session.return_value = mock_session
         
         # Create service and test
         service = QuizService()
         result = service.create_chapter_quiz(chapter=1, limit=10)
         
         # Assertions
-        assert result == 'test_quiz_123'
-        mock_question_manager.get_questions.assert_called_once_with(
+        assert result == expected
+        patched_question_manager.get_questions.assert_called_once_with(
             category='Technologies and Tools', limit=10
         )
-        mock_quiz_manager.create_quiz_session.assert_called_once_with('chapter_quiz', 1)
-        mock_session.add_questions.assert_called_once()
+        if expected is not None:
+            patched_quiz_manager.create_quiz_session.assert_called_once_with('chapter_quiz', 1)
+            mock_session.add_questions.assert_called_once()
     
-    @patch('services.quiz_service.question_manager')
-    def test_create_chapter_quiz_no_questions(self, mock_question_manager):
-        """Test chapter quiz creation when no questions are found"""
+    def test_create_random_quiz_success(self, patched_quiz_manager, patched_question_manager, sample_questions, mock_session):
+        """Test successful random quiz creation"""
         # Setup mocks
-        mock_question_manager.get_questions.return_value = []
+        patched_question_manager.get_random_questions.return_value = sample_questions
+        patched_quiz_manager.create_quiz_session.return_value = 'test_quiz_456'
+        patched_quiz_manager.get_session.return_value = mock_session
         
         # Create service and test
         service = QuizService()
-        result = service.create_chapter_quiz(chapter=1, limit=10)
+        result = service.create_random_quiz(limit=10)
         
         # Assertions
-        assert result is None
-        mock_question_manager.get_questions.assert_called_once_with(
-            category='Technologies and Tools', limit=10
-        )
+        assert result == 'test_quiz_456'
+        patched_question_manager.get_random_questions.assert_called_once_with(10, difficulty=None)
+        patched_quiz_manager.create_quiz_session.assert_called_once_with('random_quiz')
+        mock_session.add_questions.assert_called_once()
     
-    @patch('services.quiz_service.question_manager')
-    @patch('services.quiz_service.quiz_manager')
-    def test_create_chapter_quiz_exception(self, mock_quiz_manager, mock_question_manager):
-        """Test chapter quiz creation with exception"""
+    def test_create_random_quiz_no_questions(self, patched_question_manager):
+        """Test random quiz creation when no questions are found"""
         # Setup mocks
-        mock_question_manager.get_questions.side_effect = Exception("Database error")
+        patched_question_manager.get_random_questions.return_value = []
         
         # Create service and test
         service = QuizService()
-        result = service.create_chapter_quiz(chapter=1, limit=10)
+        result = service.create_random_quiz(limit=10)
         
         # Assertions
         assert result is None
     
-    @patch('services.quiz_service.question_manager')
-    @patch('services.quiz_service.quiz_manager')
-    def test_create_random_quiz_success(self, mock_quiz_manager, mock_question_manager, sample_questions):
-        """Test successful random quiz creation"""
+    def test_category_pool_is_cached(self, patched_quiz_manager, patched_question_manager, sample_questions):
+        """Test repeated category quizzes reuse the cached question pool"""
+        # Setup mocks
+        patched_question_manager.get_questions.return_value = sample_questions
+        patched_question_manager.version = 0
+        patched_quiz_manager.create_quiz_session.return_value = 'test_quiz_789'
+        patched_quiz_manager.get_session.return_value = Mock()
+
+        # Create service and test
+        service = QuizService()
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+
+        # Assertions
+        assert patched_question_manager.get_questions.call_count == 1
+
+        service.clear_question_cache()
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+        assert patched_question_manager.get_questions.call_count == 2
+
+        # A write through the question manager bumps its version
+        patched_question_manager.version = 1
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+        assert patched_question_manager.get_questions.call_count == 3
+
+    def test_category_pool_expires(self, monkeypatch, patched_quiz_manager, patched_question_manager, sample_questions):
+        """Test a cached pool is re-fetched once its TTL window has passed"""
         # Setup mocks
-        mock_question_manager.get_questions.return_value = sample_questions
-        mock_quiz_manager.shuffle_questions.return_value = sample_questions
-        mock_quiz_manager.create_quiz_session.return_value = 'test_quiz_456'
-        mock_session = Mock()
-        mock_quiz_manager.get_session.return_value = mock_session
+        patched_question_manager.get_questions.return_value = sample_questions
+        patched_question_manager.version = 0
+        patched_quiz_manager.get_session.return_value = Mock()
+        now = [1000.0]
+        monkeypatch.setattr('services.quiz_service.time', SimpleNamespace(monotonic=lambda: now[0]))
+
+        # Create service and test
+        service = QuizService()
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+        now[0] += QuizService.POOL_CACHE_TTL_SECONDS
+        service.create_category_quiz('Cryptography and PKI', limit=10)
+
+        # Assertions
+        assert patched_question_manager.get_questions.call_count == 2
+
+    def test_section_pool_sampled_by_database(self, patched_quiz_manager, patched_question_manager,
+                                              sample_questions, mock_session):
+        """Test a section quiz draws its pool at random across all of the section's categories"""
+        # Setup mocks
+        patched_question_manager.get_random_questions.return_value = sample_questions
+        patched_question_manager.version = 0
+        patched_quiz_manager.create_quiz_session.return_value = 'test_quiz_321'
+        patched_quiz_manager.get_session.return_value = mock_session
         
         # Create service and test
         service = QuizService()
-        result = service.create_random_quiz(limit=10)
+        result = service.create_section_quiz(2, limit=2)
         
         # Assertions
-        assert result == 'test_quiz_456'
-        mock_question_manager.get_questions.assert_called_once_with(limit=10)
-        mock_quiz_manager.shuffle_questions.assert_called_once_with(sample_questions)
-        mock_quiz_manager.create_quiz_session.assert_called_once_with('random_quiz')
-        mock_session.add_questions.assert_called_once()
+        assert result == 'test_quiz_321'
+        categories = QuizService.SECTION_ALL_CATEGORIES[2]
+        patched_question_manager.get_random_questions.assert_called_once_with(
+            min(100 * len(categories), QuizService.POOL_MAX_ROWS), difficulty=None, categories=list(categories)
+        )
+        patched_question_manager.get_questions.assert_not_called()
+        assert len(mock_session.add_questions.call_args.args[0]) == 2
     
-    @patch('services.quiz_service.question_manager')
-    def test_create_random_quiz_no_questions(self, mock_question_manager):
-        """Test random quiz creation when no questions are found"""
+    def test_practice_test_reuses_section_pools(self, patched_quiz_manager, patched_question_manager,
+                                                sample_questions, mock_session):
+        """Test practice tests share one executor and fetch each section pool once"""
         # Setup mocks
-        mock_question_manager.get_questions.return_value = []
+        patched_question_manager.get_random_questions.return_value = sample_questions
+        patched_question_manager.version = 0
+        patched_quiz_manager.create_quiz_session.return_value = 'test_quiz_654'
+        patched_quiz_manager.get_session.return_value = mock_session
         
         # Create service and test
         service = QuizService()
-        result = service.create_random_quiz(limit=10)
+        executor = service._pool_executor
+        assert service.create_practice_test(question_count=10) == 'test_quiz_654'
+        assert service.create_practice_test(question_count=10) == 'test_quiz_654'
         
         # Assertions
-        assert result is None
+        assert service._pool_executor is executor
+        assert patched_question_manager.get_random_questions.call_count == len(QuizService.SECTION_CATEGORIES)
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_quiz_question_success(self, mock_quiz_manager, sample_questions):
-        """Test successful quiz question retrieval"""
+    def test_get_quiz_statistics_uses_one_category_count(self, patched_question_manager):
+        """Test quiz statistics fetch per-category counts once for every section"""
         # Setup mocks
-        mock_session = Mock()
-        mock_session.current_question_index = 0
-        mock_session.total_questions = 3
-        mock_session.get_current_question.return_value = sample_questions[0]
-        mock_quiz_manager.get_session.return_value = mock_session
-        
+        patched_question_manager.get_question_count.return_value = 12
+        patched_question_manager.get_question_tags.return_value = ['pki']
+        patched_question_manager.get_counts_by_category.return_value = {
+            'Cryptography and PKI': 7,
+            'Physical Security': 5
+        }
+
         # Create service and test
         service = QuizService()
+        stats = service.get_quiz_statistics()
+
+        # Assertions
+        patched_question_manager.get_counts_by_category.assert_called_once()
+        patched_question_manager.get_question_count.assert_called_once_with()
+        assert stats['total_categories'] == 2
+        assert stats['sections'][0]['total_questions'] == 12
+
+    def test_get_quiz_question_success(self, patched_quiz_manager, sample_questions, service, mock_session):
+        """Test successful quiz question retrieval"""
+        # Setup mocks
+        mock_session.configure_mock(**{'get_current_question.return_value': sample_questions[0]})
+        patched_quiz_manager.get_session.return_value = mock_session
+        
+        # Test
         result = service.get_quiz_question('test_quiz_123', 1)
         
         # Assertions
@@ -124,99 +229,75 @@ class TestQuizService:
         assert result['progress_percentage'] == (1 / 3) * 100
         mock_session.get_current_question.assert_called_once()
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_quiz_question_session_not_found(self, mock_quiz_manager):
-        """Test quiz question retrieval when session not found"""
+    def test_get_quiz_question_same_question_skips_save(self, patched_quiz_manager, sample_questions, service, mock_session):
+        """Test refreshing the current question does not rewrite the session"""
         # Setup mocks
-        mock_quiz_manager.get_session.return_value = None
+        mock_session.configure_mock(current_question_index=1,
+                                    **{'get_current_question.return_value': sample_questions[1]})
+        patched_quiz_manager.get_session.return_value = mock_session
         
-        # Create service and test
-        service = QuizService()
-        result = service.get_quiz_question('invalid_quiz', 1)
+        # Test
+        result = service.get_quiz_question('test_quiz_123', 2)
         
         # Assertions
-        assert result is None
+        assert result['question_number'] == 2
+        patched_quiz_manager.save_session.assert_not_called()
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_submit_quiz_answer_success(self, mock_quiz_manager, sample_questions):
-        """Test successful quiz answer submission"""
+    def test_get_quiz_question_empty_quiz(self, patched_quiz_manager, service, mock_session):
+        """Test quiz question retrieval when the quiz has no questions"""
         # Setup mocks
-        mock_session = Mock()
-        mock_session.current_question_index = 0
-        mock_session.total_questions = 3
-        mock_session.get_current_question.return_value = sample_questions[0]
-        mock_session.submit_answer.return_value = {
-            'is_correct': True,
-            'explanation': 'Correct answer',
-            'score': 1
-        }
-        mock_quiz_manager.get_session.return_value = mock_session
+        mock_session.total_questions = 0
+        patched_quiz_manager.get_session.return_value = mock_session
         
-        # Create service and test
-        service = QuizService()
-        result = service.submit_quiz_answer('test_quiz_123', '0')
+        # Test
+        result = service.get_quiz_question('test_quiz_123', 1)
         
         # Assertions
-        assert result is not None
-        assert result['is_correct'] is True
-        assert result['question_number'] == 1
-        assert result['total_questions'] == 3
-        assert result['has_next_question'] is True
-        assert result['quiz_completed'] is False
-        mock_session.submit_answer.assert_called_once_with('0', '1')
+        assert result == {'error': 'Quiz has no questions'}
+        mock_session.get_current_question.assert_not_called()
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_submit_quiz_answer_quiz_completed(self, mock_quiz_manager, sample_questions):
-        """Test quiz answer submission when quiz is completed"""
+    @pytest.mark.parametrize("question_index,has_next_question", [
+        pytest.param(0, True, id="has_next"),
+        pytest.param(2, False, id="completed")  # Last question
+    ])
+    def test_submit_quiz_answer(self, patched_quiz_manager, sample_questions, service, mock_session,
+                                question_index, has_next_question):
+        """Test quiz answer submission mid-quiz and on the last question"""
         # Setup mocks
-        mock_session = Mock()
-        mock_session.current_question_index = 2  # Last question
-        mock_session.total_questions = 3
-        mock_session.get_current_question.return_value = sample_questions[0]
-        mock_session.submit_answer.return_value = {
-            'is_correct': True,
-            'explanation': 'Correct answer',
-            'score': 3
-        }
-        mock_quiz_manager.get_session.return_value = mock_session
+        mock_session.configure_mock(current_question_index=question_index, **{
+            'get_current_question.return_value': sample_questions[0],
+            'submit_answer.return_value': {'is_correct': True, 'explanation': 'Correct answer', 'score': 1}
+        })
+        patched_quiz_manager.get_session.return_value = mock_session
         
-        # Create service and test
-        service = QuizService()
+        # Test
         result = service.submit_quiz_answer('test_quiz_123', '0')
         
         # Assertions
         assert result is not None
-        assert result['quiz_completed'] is True
-        assert result['has_next_question'] is False
-    
-    @patch('services.quiz_service.quiz_manager')
-    def test_submit_quiz_answer_session_not_found(self, mock_quiz_manager):
-        """Test quiz answer submission when session not found"""
-        # Setup mocks
-        mock_quiz_manager.get_session.return_value = None
-        
-        # Create service and test
-        service = QuizService()
-        result = service.submit_quiz_answer('invalid_quiz', '0')
-        
-        # Assertions
-        assert result is None
+        assert result['is_correct'] is True
+        assert result['question_number'] == question_index + 1
+        assert result['total_questions'] == 3
+        assert result['has_next_question'] is has_next_question
+        assert result['quiz_completed'] is not has_next_question
+        mock_session.submit_answer.assert_called_once_with('0', '1')
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_quiz_results_success(self, mock_quiz_manager):
+    @pytest.mark.parametrize("end_time", [
+        pytest.param(None, id="first_call"),
+        pytest.param(datetime(2024, 1, 1, 12, 30), id="already_completed")  # Nothing new to persist
+    ])
+    def test_get_quiz_results_success(self, patched_quiz_manager, service, mock_session, end_time):
         """Test successful quiz results retrieval"""
         # Setup mocks
-        mock_session = Mock()
-        mock_session.get_quiz_results.return_value = {
+        mock_session.configure_mock(end_time=end_time, **{'get_quiz_results.return_value': {
             'quiz_id': 'test_quiz_123',
             'score': 8,
             'total_questions': 10,
             'percentage': 80.0
-        }
-        mock_quiz_manager.get_session.return_value = mock_session
+        }})
+        patched_quiz_manager.get_session.return_value = mock_session
         
-        # Create service and test
-        service = QuizService()
+        # Test
         result = service.get_quiz_results('test_quiz_123')
         
         # Assertions
@@ -224,34 +305,22 @@ class TestQuizService:
         assert result['score'] == 8
         assert result['percentage'] == 80.0
         mock_session.get_quiz_results.assert_called_once()
+        if end_time is None:
+            patched_quiz_manager.save_session.assert_called_once_with(mock_session, fields=('completed', 'end_time'))
+        else:
+            patched_quiz_manager.save_session.assert_not_called()
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_quiz_results_session_not_found(self, mock_quiz_manager):
-        """Test quiz results retrieval when session not found"""
-        # Setup mocks
-        mock_quiz_manager.get_session.return_value = None
-        
-        # Create service and test
-        service = QuizService()
-        result = service.get_quiz_results('invalid_quiz')
-        
-        # Assertions
-        assert result is None
-    
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_wrong_questions_review_success(self, mock_quiz_manager):
+    def test_get_wrong_questions_review_success(self, patched_quiz_manager, service, mock_session):
         """Test successful wrong questions review retrieval"""
         # Setup mocks
         wrong_questions = [
             {'id': '1', 'question_text': 'Question 1', 'user_answer': 'A', 'correct_answer': 'B'},
             {'id': '2', 'question_text': 'Question 2', 'user_answer': 'C', 'correct_answer': 'D'}
         ]
-        mock_session = Mock()
-        mock_session.get_wrong_questions_for_review.return_value = wrong_questions
-        mock_quiz_manager.get_session.return_value = mock_session
+        mock_session.configure_mock(**{'get_wrong_questions_for_review.return_value': wrong_questions})
+        patched_quiz_manager.get_session.return_value = mock_session
         
-        # Create service and test
-        service = QuizService()
+        # Test
         result = service.get_wrong_questions_review('test_quiz_123')
         
         # Assertions
@@ -259,91 +328,55 @@ class TestQuizService:
         assert len(result) == 2
         mock_session.get_wrong_questions_for_review.assert_called_once()
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_get_wrong_questions_review_session_not_found(self, mock_quiz_manager):
-        """Test wrong questions review when session not found"""
+    @pytest.mark.parametrize("method_name,args,expected", [
+        ('get_quiz_question', ('invalid_quiz', 1), None),
+        ('submit_quiz_answer', ('invalid_quiz', '0'), None),
+        ('get_quiz_results', ('invalid_quiz',), None),
+        ('get_wrong_questions_review', ('invalid_quiz',), [])
+    ])
+    def test_session_not_found(self, patched_quiz_manager, service, method_name, args, expected):
+        """Test quiz session methods when the session is not found"""
         # Setup mocks
-        mock_quiz_manager.get_session.return_value = None
+        patched_quiz_manager.get_session.return_value = None
         
-        # Create service and test
-        service = QuizService()
-        result = service.get_wrong_questions_review('invalid_quiz')
+        # Test
+        result = getattr(service, method_name)(*args)
         
         # Assertions
-        assert result == []
+        assert result == expected
     
-    @patch('services.quiz_service.quiz_manager')
-    def test_cleanup_quiz_session(self, mock_quiz_manager):
+    def test_cleanup_quiz_session(self, patched_quiz_manager, service):
         """Test quiz session cleanup"""
-        # Create service and test
-        service = QuizService()
+        # Test
         service.cleanup_quiz_session('test_quiz_123')
         
         # Assertions
-        mock_quiz_manager.cleanup_session.assert_called_once_with('test_quiz_123')
+        patched_quiz_manager.cleanup_session.assert_called_once_with('test_quiz_123')
     
-    def test_parse_question_json_fields(self, sample_questions):
+    @pytest.mark.parametrize("fields,expected", [
+        pytest.param(
+            {'options': '["Option A", "Option B", "Option C"]', 'tags': '["tag1", "tag2"]',
+             'correct_answers': '["Answer1", "Answer2"]'},
+            {'options': ["Option A", "Option B", "Option C"], 'tags': ["tag1", "tag2"],
+             'correct_answers': ["Answer1", "Answer2"]},
+            id="json_strings"
+        ),
+        pytest.param(
+            {'options': 'invalid json', 'tags': 'invalid json', 'correct_answers': 'invalid json'},
+            # correct_answers falls back to the original string
+            {'options': [], 'tags': [], 'correct_answers': ['invalid json']},
+            id="invalid_json"
+        ),
+        pytest.param(
+            {'options': ['Option A', 'Option B'], 'tags': ['tag1', 'tag2'], 'correct_answers': ['Answer1']},
+            {'options': ['Option A', 'Option B'], 'tags': ['tag1', 'tag2'], 'correct_answers': ['Answer1']},
+            id="already_parsed"
+        )
+    ])
+    def test_parse_question_json_fields(self, service, fields, expected):
         """Test parsing of JSON fields in questions"""
-        # Create questions with JSON strings
-        questions_with_json = [
-            {
-                'id': '1',
-                'question_text': 'Test question',
-                'options': '["Option A", "Option B", "Option C"]',
-                'tags': '["tag1", "tag2"]',
-                'correct_answers': '["Answer1", "Answer2"]'
-            }
-        ]
-        
-        # Create service and test
-        service = QuizService()
-        result = service._parse_question_json_fields(questions_with_json)
+        questions = [{'id': '1', 'question_text': 'Test question', **fields}]
         
-        # Assertions
-        assert result[0]['options'] == ["Option A", "Option B", "Option C"]
-        assert result[0]['tags'] == ["tag1", "tag2"]
-        assert result[0]['correct_answers'] == ["Answer1", "Answer2"]
-    
-    def test_parse_question_json_fields_invalid_json(self):
-        """Test parsing of invalid JSON fields in questions"""
-        # Create questions with invalid JSON strings
-        questions_with_invalid_json = [
-            {
-                'id': '1',
-                'question_text': 'Test question',
-                'options': 'invalid json',
-                'tags': 'invalid json',
-                'correct_answers': 'invalid json'
-            }
-        ]
-        
-        # Create service and test
-        service = QuizService()
-        result = service._parse_question_json_fields(questions_with_invalid_json)
-        
-        # Assertions
-        assert result[0]['options'] == []
-        assert result[0]['tags'] == []
-        assert result[0]['correct_answers'] == ['invalid json']  # Falls back to original string
-    
-    def test_parse_question_json_fields_already_parsed(self):
-        """Test parsing when JSON fields are already parsed"""
-        # Create questions with already parsed JSON
-        questions_already_parsed = [
-            {
-                'id': '1',
-                'question_text': 'Test question',
-                'options': ['Option A', 'Option B'],
-                'tags': ['tag1', 'tag2'],
-                'correct_answers': ['Answer1']
-            }
-        ]
+        result = service._parse_question_json_fields(questions)
         
-        # Create service and test
-        service = QuizService()
-        result = service._parse_question_json_fields(questions_already_parsed)
-        
-        # Assertions
-        assert result[0]['options'] == ['Option A', 'Option B']
-        assert result[0]['tags'] == ['tag1', 'tag2']
-        assert result[0]['correct_answers'] == ['Answer1']
+        assert {name: result[0][name] for name in expected} == expected
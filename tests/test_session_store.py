@@ -0,0 +1,182 @@
+"""
+Unit tests for the quiz session stores
+"""
+import pytest
+from utils.quiz_logic import QuizSession
+from utils.session_store import RedisSessionStore, SessionStore
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis.Redis calls RedisSessionStore makes
+
+    Hashes live in self.hashes and TTLs in self.ttls. round_trips counts direct
+    commands and pipeline executions, and the registered script is emulated with
+    the same HSET-if-exists semantics as the Lua source.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+        self.round_trips = 0
+        self.written = []  # (key, mapping) for every HSET
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        def update_if_exists(keys, args):
+            self.round_trips += 1
+            key = keys[0]
+            if key not in self.hashes:
+                return 0
+            ttl, pairs = args[0], args[1:]
+            self._hset(key, dict(zip(pairs[::2], pairs[1::2])))
+            self.ttls[key] = ttl
+            return 1
+        return update_if_exists
+
+    def delete(self, key):
+        self.round_trips += 1
+        self.ttls.pop(key, None)
+        return 1 if self.hashes.pop(key, None) is not None else 0
+
+    def expire(self, key, ttl):
+        self.round_trips += 1
+        return self._expire(key, ttl)
+
+    def expire_now(self, key):
+        """Simulate the key's TTL running out"""
+        self.hashes.pop(key, None)
+        self.ttls.pop(key, None)
+
+    def _hset(self, key, mapping):
+        self.written.append((key, dict(mapping)))
+        self.hashes.setdefault(key, {}).update(
+            {field.encode(): value.encode() if isinstance(value, str) else value
+             for field, value in mapping.items()}
+        )
+
+    def _expire(self, key, ttl):
+        if key not in self.hashes:
+            return False
+        self.ttls[key] = ttl
+        return True
+
+class FakePipeline:
+    """Queues commands and runs them in one round trip on execute()"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append(lambda: self.redis._hset(key, mapping))
+
+    def hgetall(self, key):
+        self.commands.append(lambda: dict(self.redis.hashes.get(key, {})))
+
+    def expire(self, key, ttl):
+        self.commands.append(lambda: self.redis._expire(key, ttl))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [command() for command in self.commands]
+
+
+@pytest.fixture
+def fake_redis():
+    """Empty FakeRedis client"""
+    return FakeRedis()
+
+@pytest.fixture
+def store(fake_redis):
+    """RedisSessionStore over the fake client"""
+    return RedisSessionStore(fake_redis, QuizSession, ttl_seconds=60)
+
+@pytest.fixture
+def stored_session(store, sample_questions):
+    """A session with its questions, saved under its quiz_id"""
+    session = QuizSession('test_quiz_123', 'chapter_quiz', 1)
+    session.add_questions([dict(q) for q in sample_questions])
+    store.set(session.quiz_id, session)
+    return session
+
+
+class TestRedisSessionStore:
+    """Test cases for RedisSessionStore"""
+
+    def test_set_and_get_round_trip(self, store, fake_redis, stored_session):
+        """Test a stored session is rebuilt with its questions and TTL"""
+        restored = store.get('test_quiz_123')
+
+        assert restored.quiz_id == stored_session.quiz_id
+        assert restored.questions == stored_session.questions
+        assert restored.start_time == stored_session.start_time
+        assert fake_redis.ttls['quiz:session:test_quiz_123'] == 60
+
+    def test_get_is_one_round_trip(self, store, fake_redis, stored_session):
+        """Test get() reads the hash and refreshes the TTL in a single pipeline"""
+        fake_redis.ttls['quiz:session:test_quiz_123'] = 1
+        fake_redis.round_trips = 0
+
+        store.get('test_quiz_123')
+
+        assert fake_redis.round_trips == 1
+        assert fake_redis.ttls['quiz:session:test_quiz_123'] == 60
+
+    def test_get_missing(self, store):
+        """Test an unknown key returns None"""
+        assert store.get('missing') is None
+
+    def test_update_writes_only_named_fields(self, store, fake_redis, stored_session):
+        """Test a partial update rewrites just the answer fields"""
+        stored_session.submit_answer('0', '1')
+        fake_redis.written.clear()
+
+        store.update('test_quiz_123', stored_session, QuizSession.ANSWER_FIELDS)
+
+        assert [set(mapping) for _, mapping in fake_redis.written] == [set(QuizSession.ANSWER_FIELDS)]
+        restored = store.get('test_quiz_123')
+        assert restored.score == 1
+        assert restored.current_question_index == 1
+        assert restored.questions == stored_session.questions
+
+    def test_update_after_expiry_writes_full_session(self, store, fake_redis, stored_session):
+        """Test a partial update of an expired session re-creates every field instead of a partial hash"""
+        stored_session.submit_answer('0', '1')
+        fake_redis.expire_now('quiz:session:test_quiz_123')
+
+        store.update('test_quiz_123', stored_session, QuizSession.ANSWER_FIELDS)
+
+        restored = store.get('test_quiz_123')
+        assert restored.score == 1
+        assert restored.questions == stored_session.questions
+        assert restored.start_time == stored_session.start_time
+
+    def test_delete_and_touch(self, store, stored_session):
+        """Test delete() and touch() report whether the session existed"""
+        assert store.touch('test_quiz_123') is True
+        assert store.delete('test_quiz_123') is True
+        assert store.delete('test_quiz_123') is False
+        assert store.touch('test_quiz_123') is False
+        assert store.get('test_quiz_123') is None
+
+
+class TestSessionStoreInterface:
+    """Test cases for the SessionStore base class"""
+
+    def test_incomplete_store_fails_at_construction(self):
+        """Test a backend missing a required method cannot be instantiated"""
+        class NoTouchStore(SessionStore):
+            def get(self, key):
+                return None
+
+            def set(self, key, session):
+                pass
+
+            def delete(self, key):
+                return False
+
+        with pytest.raises(TypeError, match='touch'):
+            NoTouchStore()
@@ -1,17 +1,153 @@
 """
 Quiz Logic Module - Handles quiz state, scoring, and question management
 """
+import itertools
 import json
 import random
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import List, Dict, Any, Optional, Tuple, Iterable, FrozenSet, NamedTuple, Set
 from datetime import datetime
 import logging
+from functools import lru_cache
+from utils.session_store import SessionStore, create_session_store
+
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so handlers work with either
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+def reservoir_sample(items: Iterable[Any], k: int) -> List[Any]:
+    """
+    Pick k items uniformly at random in one pass (Algorithm R)
+    
+    Only k items are ever held, so large pools are never copied or shuffled.
+    The order of the result is not random; shuffle it if order matters.
+    
+    Args:
+        items: Any iterable, including generators
+        k: Number of items to keep
+        
+    Returns:
+        List of at most k items
+    """
+    reservoir: List[Any] = []
+    if k <= 0:
+        return reservoir
+    for seen, item in enumerate(items):
+        if seen < k:
+            reservoir.append(item)
+        else:
+            slot = random.randrange(seen + 1)
+            if slot < k:
+                reservoir[slot] = item
+    return reservoir
+
+MULTIPLE_CHOICE_TYPES = frozenset(('multiple_choice', 'concept_multiple_choice', 'scenario_multiple_choice'))
+FILL_IN_BLANK_TYPES = frozenset(('fill_in_blank', 'fill_in_the_blank'))
+
+class AnswerKey(NamedTuple):
+    """A question's accepted answers, parsed once so checking an answer is a set lookup"""
+    by_index: bool  # Answers are option indices rather than text
+    strip: bool  # Strip whitespace from text answers before comparing
+    accepted: FrozenSet[Any]
+    explanation: str
+    display: str
+    
+    def check(self, user_answer: str) -> bool:
+        """Return True if user_answer is one of the accepted answers"""
+        if self.by_index:
+            try:
+                return int(user_answer) in self.accepted
+            except ValueError:
+                return False
+        if self.strip:
+            user_answer = user_answer.strip()
+        return user_answer.lower() in self.accepted
+
+def _index_set(value: Any) -> FrozenSet[int]:
+    """The option index written as value, or nothing if value is not a plain integer"""
+    try:
+        index = int(str(value))
+    except ValueError:
+        return frozenset()
+    return frozenset((index,)) if str(index) == str(value) else frozenset()
+
+@lru_cache(maxsize=4096)
+def _decode_answer_list(raw: str) -> Tuple[Any, ...]:
+    """Decode a JSON-encoded answer list, shared across sessions that reuse the same question"""
+    try:
+        value = json_loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return (raw,)
+    # Valid JSON that is not a list (e.g. "5" or 5) is a single answer
+    return tuple(value) if isinstance(value, list) else (value,)
+
+def build_answer_key(question: Dict[str, Any]) -> AnswerKey:
+    """Parse a question's correct answer(s) into an AnswerKey"""
+    question_type = question.get('question_type', '')
+    explanation = question.get('explanation', 'No explanation available.')
+    
+    if question_type in MULTIPLE_CHOICE_TYPES:
+        # For multiple choice, correct_answer can be index or actual answer text
+        correct_answer = question.get('correct_answer', '')
+        options = question.get('options', [])
+        
+        if isinstance(correct_answer, (int, str)) and str(correct_answer).isdigit():
+            try:
+                index = int(correct_answer)
+                accepted = frozenset((index,))
+            except ValueError:
+                index, accepted = None, frozenset()
+            if index is not None and 0 <= index < len(options):
+                display = options[index]
+            else:
+                display = f"Option {correct_answer}"
+        else:
+            # Accept the index of any option whose text matches correct_answer
+            target = str(correct_answer).strip().lower()
+            accepted = frozenset(i for i, option in enumerate(options) if str(option).strip().lower() == target)
+            display = str(correct_answer)
+        return AnswerKey(True, False, accepted, explanation, display)
+    
+    if question_type == 'true_false':
+        correct_answer = str(question.get('correct_answer', 'True'))
+        return AnswerKey(False, False, frozenset((correct_answer.lower(),)), explanation, correct_answer)
+    
+    if question_type in FILL_IN_BLANK_TYPES:
+        # For fill-in-blank, check against correct_answers array or correct_answer
+        correct_answers = question.get('correct_answers', [])
+        if not correct_answers:
+            correct_answers = [question.get('correct_answer', '')]
+        
+        if isinstance(correct_answers, str):
+            correct_answers = _decode_answer_list(correct_answers)
+        elif not isinstance(correct_answers, (list, tuple)):
+            correct_answers = (correct_answers,)
+        
+        accepted = frozenset(str(ans).strip().lower() for ans in correct_answers if ans)
+        if correct_answers and correct_answers[0]:
+            display = str(correct_answers[0])  # Show the first correct answer
+        else:
+            display = str(question.get('correct_answer', ''))
+        return AnswerKey(False, True, accepted, explanation, display)
+    
+    # Default to multiple choice logic for unknown types
+    return AnswerKey(True, False, _index_set(question.get('correct_answer', '0')), explanation,
+                     str(question.get('correct_answer', '')))
+
 class QuizSession:
     """Manages a quiz session with state, scoring, and question tracking"""
     
+    __slots__ = ('quiz_id', 'quiz_type', 'chapter', 'questions', 'current_question_index', 'answers',
+                 'wrong_questions', 'start_time', 'end_time', 'score', 'total_questions', 'completed',
+                 '_wrong_set', '_answer_keys', '_results')
+    
+    # Attributes changed by submit_answer, for partial writes to a shared session store
+    ANSWER_FIELDS = ('current_question_index', 'answers', 'wrong_questions', 'score')
+    
     def __init__(self, quiz_id: str, quiz_type: str, chapter: Optional[int] = None):
         self.quiz_id = quiz_id
         self.quiz_type = quiz_type
@@ -19,17 +155,58 @@ class QuizSession:
         self.questions: List[Dict[str, Any]] = []
         self.current_question_index = 0
         self.answers: List[Dict[str, Any]] = []
-        self.wrong_questions: List[int] = []  # Indices of wrong questions
+        self.wrong_questions: List[int] = []  # Indices of wrong questions, in the order first missed
+        self._wrong_set: Set[int] = set()  # Same indices for O(1) membership; not serialized
         self.start_time = datetime.utcnow()
+        self.end_time: Optional[datetime] = None  # Set once, when the quiz is completed
         self.score = 0
         self.total_questions = 0
         self.completed = False
+        self._answer_keys: Dict[int, AnswerKey] = {}  # Not serialized; rebuilt on demand
+        self._results: Optional[Dict[str, Any]] = None  # get_quiz_results() output until the next answer
         
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize session state for a shared session store"""
+        return {
+            "quiz_id": self.quiz_id,
+            "quiz_type": self.quiz_type,
+            "chapter": self.chapter,
+            "questions": self.questions,
+            "current_question_index": self.current_question_index,
+            "answers": self.answers,
+            "wrong_questions": self.wrong_questions,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "score": self.score,
+            "total_questions": self.total_questions,
+            "completed": self.completed
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuizSession':
+        """Rebuild a session from to_dict() output"""
+        session = cls(data["quiz_id"], data["quiz_type"], data.get("chapter"))
+        session.questions = data.get("questions", [])
+        session.current_question_index = data.get("current_question_index", 0)
+        session.answers = data.get("answers", [])
+        session.wrong_questions = data.get("wrong_questions", [])
+        session._wrong_set = set(session.wrong_questions)
+        session.start_time = datetime.fromisoformat(data["start_time"])
+        if data.get("end_time"):
+            session.end_time = datetime.fromisoformat(data["end_time"])
+        session.score = data.get("score", 0)
+        session.total_questions = data.get("total_questions", len(session.questions))
+        session.completed = data.get("completed", False)
+        return session
+    
     def add_questions(self, questions: List[Dict[str, Any]]):
         """Add questions to the quiz session"""
         self.questions = questions
         self.total_questions = len(questions)
-        logger.info(f"Added {len(questions)} questions to quiz session {self.quiz_id}")
+        # Parse every answer now so submit_answer only does a lookup
+        self._answer_keys = {index: build_answer_key(question) for index, question in enumerate(questions)}
+        self._results = None
+        logger.info("Added %d questions to quiz session %s", len(questions), self.quiz_id)
     
     def get_current_question(self) -> Optional[Dict[str, Any]]:
         """Get the current question"""
@@ -43,22 +220,27 @@ class QuizSession:
         if not current_question:
             return {"error": "No current question"}
         
-        # Parse the answer based on question type
-        is_correct, explanation = self._check_answer(current_question, answer)
+        # Check the answer against the question's parsed answer key
+        key = self._current_answer_key()
+        is_correct = key.check(answer)
+        explanation = key.explanation
+        correct_answer = key.display
         
         # Store the answer
         answer_data = {
             "question_id": question_id,
             "question_index": self.current_question_index,
             "user_answer": answer,
-            "correct_answer": self._get_correct_answer(current_question),
+            "correct_answer": correct_answer,
             "is_correct": is_correct,
-            "submitted_at": datetime.utcnow().isoformat()
+            "submitted_at_ts": time.time()  # Formatted in get_quiz_results
         }
         self.answers.append(answer_data)
+        self._results = None
         
-        # Track wrong questions for review
-        if not is_correct:
+        # Track wrong questions for review (once each, even if the question is answered again)
+        if not is_correct and self.current_question_index not in self._wrong_set:
+            self._wrong_set.add(self.current_question_index)
             self.wrong_questions.append(self.current_question_index)
         
         # Update score
@@ -68,7 +250,7 @@ class QuizSession:
         result = {
             "is_correct": is_correct,
             "explanation": explanation,
-            "correct_answer": self._get_correct_answer(current_question),
+            "correct_answer": correct_answer,
             "user_answer": answer,
             "score": self.score,
             "total_questions": self.total_questions,
@@ -87,15 +269,31 @@ class QuizSession:
         return self.current_question_index < len(self.questions)
     
     def get_quiz_results(self) -> Dict[str, Any]:
-        """Get final quiz results"""
+        """
+        Get final quiz results
+        
+        The first call completes the quiz and fixes its end time, which is
+        serialized with the session so every worker reports the same duration.
+        Later calls return the same (shared, not to be mutated) dict until
+        another answer is submitted.
+        """
+        if self._results is not None:
+            return self._results
         if not self.completed:
             self.completed = True
+        if self.end_time is None:
+            self.end_time = datetime.utcnow()
         
         percentage = (self.score / self.total_questions) * 100 if self.total_questions > 0 else 0
-        end_time = datetime.utcnow()
-        duration = (end_time - self.start_time).total_seconds()
+        duration = (self.end_time - self.start_time).total_seconds()
         
-        return {
+        answers = [
+            {**answer, "submitted_at": datetime.utcfromtimestamp(answer["submitted_at_ts"]).isoformat()}
+            if "submitted_at_ts" in answer else answer
+            for answer in self.answers
+        ]
+        
+        self._results = {
             "quiz_id": self.quiz_id,
             "quiz_type": self.quiz_type,
             "chapter": self.chapter,
@@ -105,154 +303,92 @@ class QuizSession:
             "wrong_questions": len(self.wrong_questions),
             "duration_seconds": round(duration, 2),
             "start_time": self.start_time.isoformat(),
-            "end_time": end_time.isoformat(),
-            "answers": self.answers,
+            "end_time": self.end_time.isoformat(),
+            "answers": answers,
             "wrong_question_indices": self.wrong_questions
         }
+        return self._results
     
     def get_wrong_questions_for_review(self) -> List[Dict[str, Any]]:
         """Get questions that were answered incorrectly for review"""
         wrong_questions = []
+        # One pass over the answers instead of a scan per wrong question (first answer wins)
+        answer_by_index: Dict[int, Dict[str, Any]] = {}
+        for answer in self.answers:
+            answer_by_index.setdefault(answer["question_index"], answer)
         for index in self.wrong_questions:
             if index < len(self.questions):
-                question = self.questions[index].copy()
-                # Add the user's answer and correct answer
-                answer_data = next((a for a in self.answers if a["question_index"] == index), None)
+                answer_data = answer_by_index.get(index)
                 if answer_data:
-                    question["user_answer"] = answer_data["user_answer"]
-                    question["correct_answer"] = answer_data["correct_answer"]
-                    question["is_correct"] = answer_data["is_correct"]
+                    # Build the copy with the user's answer and correct answer in one step
+                    question = {
+                        **self.questions[index],
+                        "user_answer": answer_data["user_answer"],
+                        "correct_answer": answer_data["correct_answer"],
+                        "is_correct": answer_data["is_correct"]
+                    }
+                else:
+                    question = dict(self.questions[index])
                 wrong_questions.append(question)
         return wrong_questions
     
+    def _current_answer_key(self) -> AnswerKey:
+        """Answer key for the current question (parsed on demand for sessions loaded from a store)"""
+        key = self._answer_keys.get(self.current_question_index)
+        if key is None:
+            key = build_answer_key(self.questions[self.current_question_index])
+            self._answer_keys[self.current_question_index] = key
+        return key
+    
     def _check_answer(self, question: Dict[str, Any], user_answer: str) -> Tuple[bool, str]:
         """Check if the user's answer is correct"""
-        question_type = question.get('question_type', '')
-        explanation = question.get('explanation', 'No explanation available.')
-        
-        if question_type in ['multiple_choice', 'concept_multiple_choice', 'scenario_multiple_choice']:
-            # For multiple choice, correct_answer can be index or actual answer text
-            correct_answer = question.get('correct_answer', '')
-            options = question.get('options', [])
-            
-            # If correct_answer is a number (index), check by index
-            if isinstance(correct_answer, (int, str)) and str(correct_answer).isdigit():
-                try:
-                    user_index = int(user_answer)
-                    correct_index = int(correct_answer)
-                    is_correct = user_index == correct_index
-                except ValueError:
-                    is_correct = False
-            else:
-                # If correct_answer is text, check against options
-                try:
-                    user_index = int(user_answer)
-                    if 0 <= user_index < len(options):
-                        user_answer_text = options[user_index]
-                        is_correct = str(user_answer_text).strip().lower() == str(correct_answer).strip().lower()
-                    else:
-                        is_correct = False
-                except (ValueError, IndexError):
-                    is_correct = False
-        
-        elif question_type == 'true_false':
-            correct_answer = question.get('correct_answer', 'True')
-            is_correct = user_answer.lower() == str(correct_answer).lower()
-        
-        elif question_type in ['fill_in_blank', 'fill_in_the_blank']:
-            # For fill-in-blank, check against correct_answers array or correct_answer
-            correct_answers = question.get('correct_answers', [])
-            if not correct_answers:
-                correct_answers = [question.get('correct_answer', '')]
-            
-            if isinstance(correct_answers, str):
-                try:
-                    correct_answers = json.loads(correct_answers)
-                except json.JSONDecodeError:
-                    correct_answers = [correct_answers]
-            
-            user_answer_clean = user_answer.strip().lower()
-            is_correct = any(user_answer_clean == str(ans).strip().lower() for ans in correct_answers if ans)
-        
-        else:
-            # Default to multiple choice logic for unknown types
-            correct_answer = question.get('correct_answer', '0')
-            try:
-                user_index = int(user_answer)
-                is_correct = str(user_index) == str(correct_answer)
-            except ValueError:
-                is_correct = False
-        
-        return is_correct, explanation
+        key = build_answer_key(question)
+        return key.check(user_answer), key.explanation
     
     def _get_correct_answer(self, question: Dict[str, Any]) -> str:
         """Get the correct answer for display"""
-        question_type = question.get('question_type', '')
-        
-        if question_type in ['multiple_choice', 'concept_multiple_choice', 'scenario_multiple_choice']:
-            correct_answer = question.get('correct_answer', '')
-            options = question.get('options', [])
-            
-            # If correct_answer is a number (index), get the option text
-            if isinstance(correct_answer, (int, str)) and str(correct_answer).isdigit():
-                try:
-                    index = int(correct_answer)
-                    if 0 <= index < len(options):
-                        return options[index]
-                except (ValueError, IndexError):
-                    pass
-                return f"Option {correct_answer}"
-            else:
-                # If correct_answer is text, return it directly
-                return str(correct_answer)
-        
-        elif question_type == 'true_false':
-            return str(question.get('correct_answer', 'True'))
-        
-        elif question_type in ['fill_in_blank', 'fill_in_the_blank']:
-            correct_answers = question.get('correct_answers', [])
-            if not correct_answers:
-                correct_answers = [question.get('correct_answer', '')]
-            
-            if isinstance(correct_answers, str):
-                try:
-                    correct_answers = json.loads(correct_answers)
-                except json.JSONDecodeError:
-                    correct_answers = [correct_answers]
-            
-            if correct_answers and correct_answers[0]:
-                return str(correct_answers[0])  # Return first correct answer
-            return str(question.get('correct_answer', ''))
-        
-        return str(question.get('correct_answer', ''))
+        return build_answer_key(question).display
 
 class QuizManager:
     """Manages quiz sessions and provides quiz-related utilities"""
     
-    def __init__(self):
-        self.active_sessions: Dict[str, QuizSession] = {}
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store or create_session_store(QuizSession)
+        self._id_counter = itertools.count()
+    
+    @property
+    def active_sessions(self) -> Dict[str, QuizSession]:
+        """Sessions held in this process (empty when a shared store such as Redis is used)"""
+        return getattr(self.store, 'sessions', {})
     
     def create_quiz_session(self, quiz_type: str, chapter: Optional[int] = None) -> str:
         """Create a new quiz session and return session ID"""
-        quiz_id = f"{quiz_type}_{chapter}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+        # Nanosecond timestamp plus a counter, so sessions created in the same second get distinct IDs
+        quiz_id = f"{quiz_type}_{chapter}_{time.time_ns()}_{next(self._id_counter)}"
         session = QuizSession(quiz_id, quiz_type, chapter)
-        self.active_sessions[quiz_id] = session
-        logger.info(f"Created quiz session: {quiz_id}")
+        self.store.set(quiz_id, session)
+        logger.info("Created quiz session: %s", quiz_id)
         return quiz_id
     
     def get_session(self, quiz_id: str) -> Optional[QuizSession]:
         """Get a quiz session by ID"""
-        return self.active_sessions.get(quiz_id)
+        return self.store.get(quiz_id)
+    
+    def save_session(self, session: QuizSession, fields: Optional[Tuple[str, ...]] = None):
+        """Persist a session after it has been mutated, optionally writing only the changed fields"""
+        if fields:
+            self.store.update(session.quiz_id, session, fields)
+        else:
+            self.store.set(session.quiz_id, session)
     
     def cleanup_session(self, quiz_id: str):
         """Remove a quiz session"""
-        if quiz_id in self.active_sessions:
-            del self.active_sessions[quiz_id]
-            logger.info(f"Cleaned up quiz session: {quiz_id}")
+        if self.store.delete(quiz_id):
+            logger.info("Cleaned up quiz session: %s", quiz_id)
     
-    def shuffle_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Shuffle questions while maintaining their original order for reference"""
-        shuffled = questions.copy()
+    def shuffle_questions(self, questions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the questions in a new random order, leaving the caller's sequence untouched"""
+        shuffled = list(questions)
         random.shuffle(shuffled)
         return shuffled
     
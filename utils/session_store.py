@@ -0,0 +1,198 @@
+"""
+Session Store Module - Pluggable storage backends for quiz sessions
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+try:
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    from json import dumps as _dumps, loads as _loads
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle for longer than this are dropped by the store
+DEFAULT_SESSION_TTL_SECONDS = 2 * 60 * 60
+
+# The in-memory store evicts the least recently used session beyond this many
+DEFAULT_MAX_SESSIONS = 10000
+
+# HSET the given fields and refresh the TTL only if the session hash still exists,
+# so a partial write can never re-create an expired session without its other fields.
+# KEYS[1] is the session key; ARGV is the TTL followed by field/value pairs. Returns 1 if written.
+_UPDATE_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+class SessionStore(ABC):
+    """Interface for quiz session storage backends keyed by quiz_id"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the session stored under key, or None if missing/expired"""
+
+    @abstractmethod
+    def set(self, key: str, session: Any):
+        """Store (or overwrite) a session and reset its TTL"""
+
+    def update(self, key: str, session: Any, fields: Iterable[str]):
+        """Persist only the named session attributes (defaults to a full write)"""
+        self.set(key, session)
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a session, returning True if it existed"""
+
+    @abstractmethod
+    def touch(self, key: str) -> bool:
+        """Reset a session's TTL without rewriting it"""
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local session store with idle expiry and an LRU size cap (the default backend)
+
+    Sessions are kept in least-recently-used order. Every key shares the same
+    TTL, so that is also expiry order, and writes drop expired sessions from
+    the front before evicting any live one.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, Any] = OrderedDict()
+        self._expires_at: Dict[str, float] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        session = self.sessions.get(key)
+        if session is None:
+            return None
+        if self._expires_at.get(key, 0) < time.monotonic():
+            self.delete(key)
+            logger.info("Expired quiz session: %s", key)
+            return None
+        self.touch(key)
+        return session
+
+    def set(self, key: str, session: Any):
+        self.sessions[key] = session
+        self.touch(key)
+        self._evict()
+
+    def update(self, key: str, session: Any, fields: Iterable[str]):
+        # The stored object is the caller's object, so only the TTL needs refreshing
+        self.set(key, session)
+
+    def delete(self, key: str) -> bool:
+        self._expires_at.pop(key, None)
+        return self.sessions.pop(key, None) is not None
+
+    def touch(self, key: str) -> bool:
+        if key not in self.sessions:
+            return False
+        self.sessions.move_to_end(key)
+        self._expires_at[key] = time.monotonic() + self.ttl_seconds
+        return True
+
+    def _evict(self):
+        """Drop expired sessions, then the least recently used ones over max_sessions"""
+        now = time.monotonic()
+        while self.sessions:
+            key = next(iter(self.sessions))
+            if self._expires_at.get(key, 0) >= now and len(self.sessions) <= self.max_sessions:
+                break
+            self.delete(key)
+            logger.info("Evicted quiz session: %s", key)
+
+class RedisSessionStore(SessionStore):
+    """
+    Redis-backed session store shared by every worker process
+
+    Each session is a Redis hash with one JSON-encoded field per attribute,
+    so per-answer updates rewrite a few small fields instead of the whole
+    question list.
+    """
+
+    def __init__(self, redis_client, session_class, ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS,
+                 key_prefix: str = 'quiz:session:'):
+        """
+        Initialize the Redis store
+
+        Args:
+            redis_client: A redis.Redis instance
+            session_class: Class providing to_dict() and from_dict() for serialization
+            ttl_seconds: Idle expiry applied on every write/touch
+            key_prefix: Prefix for Redis keys
+        """
+        self.redis = redis_client
+        self.session_class = session_class
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._update_if_exists = redis_client.register_script(_UPDATE_IF_EXISTS_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def _write(self, key: str, mapping: Dict[str, Any]):
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(key), mapping={field: _dumps(value) for field, value in mapping.items()})
+        pipe.expire(self._key(key), self.ttl_seconds)
+        pipe.execute()
+
+    def get(self, key: str) -> Optional[Any]:
+        # Read and refresh the TTL in one round trip (EXPIRE on a missing key is a no-op)
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._key(key))
+        pipe.expire(self._key(key), self.ttl_seconds)
+        payload, _ = pipe.execute()
+        if not payload:
+            return None
+        data = {field.decode() if isinstance(field, bytes) else field: _loads(value)
+                for field, value in payload.items()}
+        return self.session_class.from_dict(data)
+
+    def set(self, key: str, session: Any):
+        self._write(key, session.to_dict())
+
+    def update(self, key: str, session: Any, fields: Iterable[str]):
+        data = session.to_dict()
+        args = [self.ttl_seconds]
+        for field in fields:
+            args.extend((field, _dumps(data[field])))
+        if not self._update_if_exists(keys=[self._key(key)], args=args):
+            # The session expired since it was read; write every field so it can be rebuilt
+            self._write(key, data)
+
+    def delete(self, key: str) -> bool:
+        return bool(self.redis.delete(self._key(key)))
+
+    def touch(self, key: str) -> bool:
+        return bool(self.redis.expire(self._key(key), self.ttl_seconds))
+
+def create_session_store(session_class) -> SessionStore:
+    """
+    Build the session store for this process
+
+    Uses Redis when REDIS_URL is set (so all gunicorn workers share quiz
+    sessions) and falls back to the in-memory store otherwise.
+    """
+    ttl_seconds = int(os.environ.get('QUIZ_SESSION_TTL_SECONDS', DEFAULT_SESSION_TTL_SECONDS))
+    max_sessions = int(os.environ.get('QUIZ_SESSION_MAX_SESSIONS', DEFAULT_MAX_SESSIONS))
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url)
+            logger.info("Using Redis quiz session store")
+            return RedisSessionStore(client, session_class, ttl_seconds=ttl_seconds)
+        except ImportError:
+            logger.error("REDIS_URL is set but the redis package is not installed: pip install redis")
+    return InMemorySessionStore(ttl_seconds=ttl_seconds, max_sessions=max_sessions)